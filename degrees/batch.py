@@ -0,0 +1,248 @@
+"""
+Long-lived query mode for degrees.
+
+Loads the graph once and answers many (source, target) pairs, each given as
+a person id or a name, optionally followed by a "(YYYY)" birth year hint.
+Names are resolved without prompting, see NameIndex.match, and each
+answer reports how well each name matched and whether another person matched
+as well. Names scoring below --min-score are refused. Pairs are read as
+tab-separated lines or JSON objects with "source" and "target" keys, from
+stdin or a file, or are posted to a small local HTTP endpoint. Every answer
+is one JSON line.
+
+Usage:
+    python batch.py directory [--pairs FILE] [--workers N] [--min-score S]
+    python batch.py directory --serve PORT [--workers N] [--min-score S]
+
+The HTTP endpoint accepts GET /path?source=...&target=... for one pair and
+POST /batch with a body of pair lines for many.
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer many degrees queries.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--pairs", help="file of pairs (default: stdin)")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="serve queries over HTTP on localhost")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument("--min-score", type=float, default=0.0,
+                        help="refuse names matching below this score (0-1)")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory)
+    with make_pool(args.directory, args.workers) as pool:
+        if args.serve is not None:
+            serve(pool, args.serve, args.min_score)
+        elif args.pairs is not None:
+            with open(args.pairs, encoding="utf-8") as f:
+                write_results(run_queries(read_pairs(f), pool, args.min_score),
+                              sys.stdout)
+        else:
+            write_results(run_queries(read_pairs(sys.stdin), pool,
+                                      args.min_score), sys.stdout)
+
+
+def make_pool(directory, workers):
+    """
+    Returns a process pool whose workers each hold the graph, or an inline
+    pool when a single worker is requested.
+    """
+    if workers is None or workers <= 1:
+        return InlinePool()
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                               initargs=(directory,))
+    # Start every worker now rather than on the first query, so that none
+    # of them inherits the listening socket of --serve
+    for future in [pool.submit(int) for _ in range(workers)]:
+        future.result()
+    return pool
+
+
+def init_worker(directory):
+    """
+    Make sure a worker process has the graph loaded. Forked workers inherit
+    it from the parent; spawned workers map the snapshot written by it.
+    """
+    if not degrees.graph.person_ids:
+        degrees.load_data(directory)
+
+
+class InlinePool():
+    """
+    Stand-in for an executor that runs every query in the calling process.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        return Completed(fn(*args))
+
+
+class Completed():
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+def read_pairs(lines):
+    """
+    Yields (source, target) pairs from tab-separated or JSON lines,
+    skipping blank lines. A line that is not valid JSON yields an error
+    result in its place, so one bad line does not end the run.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                query = json.loads(line)
+            except ValueError as e:
+                yield {"line": line, "error": f"malformed JSON: {e}"}
+                continue
+            yield query.get("source", ""), query.get("target", "")
+        else:
+            source, _, target = line.partition("\t")
+            yield source.strip(), target.strip()
+
+
+def run_queries(pairs, pool, floor=0.0, window=256):
+    """
+    Answers pairs on a pool and yields results in input order, keeping at
+    most `window` queries in flight so that input can be streamed. Error
+    results from read_pairs are passed through in order.
+    """
+    pending = deque()
+    for pair in pairs:
+        if isinstance(pair, dict):
+            pending.append(Completed(pair))
+        else:
+            pending.append(pool.submit(answer, pair, floor))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def write_results(results, out):
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+        out.flush()
+
+
+def answer(pair, floor=0.0):
+    """
+    Returns a JSON-ready result for one (source, target) pair, refusing
+    names that match no one with a score of at least floor.
+    """
+    source, target = pair
+    result = {"source": source, "target": target}
+    try:
+        source_id, source_score, source_ambiguous = resolve(source, floor)
+        target_id, target_score, target_ambiguous = resolve(target, floor)
+    except (LookupError, TypeError) as e:
+        result["error"] = str(e)
+        return result
+
+    path = degrees.shortest_path(source_id, target_id)
+    result["source_id"] = source_id
+    result["target_id"] = target_id
+    result["source_score"] = source_score
+    result["target_score"] = target_score
+    result["source_ambiguous"] = source_ambiguous
+    result["target_ambiguous"] = target_ambiguous
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [list(step) for step in path]
+    return result
+
+
+def resolve(person, floor=0.0):
+    """
+    Returns (person_id, score, ambiguous) for an id or a name, raising
+    LookupError if no one matches with a score of at least floor. Numeric
+    ids are taken as strings; anything else that is not a string raises
+    TypeError.
+    """
+    if isinstance(person, int) and not isinstance(person, bool):
+        person = str(person)
+    if not isinstance(person, str):
+        raise TypeError(f"person must be an id or a name: {person!r}")
+    found = degrees.name_index.match(person, floor=floor)
+    if found is None:
+        if floor > 0:
+            raise LookupError(
+                f"no one matches {person} with a score of at least {floor}"
+            )
+        raise LookupError(f"person not found: {person}")
+    return found
+
+
+def serve(pool, port, floor=0.0):
+    """
+    Serve queries over HTTP on localhost until interrupted.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/path":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            pair = (query.get("source", [""])[0], query.get("target", [""])[0])
+            self.reply([pool.submit(answer, pair, floor).result()])
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/batch":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length).decode("utf-8", "replace")
+            pairs = read_pairs(body.splitlines())
+            self.reply(list(run_queries(pairs, pool, floor)))
+
+        def reply(self, results):
+            body = "".join(json.dumps(result) + "\n" for result in results)
+            body = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving degrees queries on http://127.0.0.1:{port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Benchmarks for degrees on synthetic data.
+
+`generate` writes a synthetic actor/movie graph in the same CSV layout as
+the `small` and `large` directories. Cast sizes follow a Pareto distribution
+and stars are drawn with Zipf-like popularity, so a few people appear in
+many movies, as in IMDb. `run` times loading, neighbors_for_person,
+resolving misspelled names and shortest_path over a fixed, seeded query
+set and reports latency percentiles and peak memory, optionally against an
+earlier JSON report.
+
+Usage:
+    python benchmark.py generate directory [--edges N] [--seed S]
+    python benchmark.py run directory [--queries N] [--seed S]
+                                      [--json FILE] [--baseline FILE]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+import degrees
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+SYLLABLES = ["ka", "ri", "to", "mo", "an", "el", "is", "ur", "ne", "sa",
+             "vi", "lo", "de", "ma", "jo", "ta", "ber", "son", "ly", "ck"]
+
+
+def generate(directory, edges=100000, seed=0, alpha=1.5, max_cast=100,
+             skew=0.8):
+    """
+    Write people.csv, movies.csv and stars.csv with about `edges` star rows.
+
+    Cast sizes are one more than a Pareto variate with shape alpha, capped
+    at max_cast. Person k is picked with weight 1 / k ** skew.
+    """
+    rng = random.Random(seed)
+    person_count = max(2, edges // 3)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w",
+              encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(person_count):
+            writer.writerow([person + 1, synthetic_name(rng),
+                             rng.randint(1900, 2005)])
+
+    weights = list(itertools.accumulate(
+        1 / (k + 1) ** skew for k in range(person_count)
+    ))
+    people = list(range(1, person_count + 1))
+
+    stars = 0
+    movie = 0
+    with open(os.path.join(directory, "movies.csv"), "w",
+              encoding="utf-8", newline="") as movies_file, \
+            open(os.path.join(directory, "stars.csv"), "w",
+                 encoding="utf-8", newline="") as stars_file:
+        movies = csv.writer(movies_file)
+        cast_rows = csv.writer(stars_file)
+        movies.writerow(["id", "title", "year"])
+        cast_rows.writerow(["person_id", "movie_id"])
+        while stars < edges:
+            movie += 1
+            size = min(max_cast, 1 + int(rng.paretovariate(alpha)),
+                       edges - stars)
+            cast = set(rng.choices(people, cum_weights=weights, k=size))
+            movies.writerow([movie, f"Movie {movie}", rng.randint(1920, 2024)])
+            for person in cast:
+                cast_rows.writerow([person, movie])
+            stars += len(cast)
+    return person_count, movie, stars
+
+
+def synthetic_name(rng):
+    first = "".join(rng.choices(SYLLABLES, k=rng.randint(1, 3)))
+    last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+    return f"{first.title()} {last.title()}"
+
+
+def percentiles(samples):
+    """
+    Returns nearest-rank p50, p90, p99 and max of samples, in milliseconds.
+    """
+    if not samples:
+        return {}
+    samples = sorted(samples)
+
+    def rank(p):
+        return 1000 * samples[min(len(samples) - 1, int(p * len(samples)))]
+
+    return {"p50_ms": rank(0.5), "p90_ms": rank(0.9), "p99_ms": rank(0.99),
+            "max_ms": 1000 * samples[-1], "count": len(samples)}
+
+
+def peak_memory_mb():
+    """
+    Returns the peak resident set size of this process in MB, if known.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def misspell(name, rng):
+    """
+    Returns name with one letter dropped, as a fuzzy lookup query.
+    """
+    k = rng.randrange(len(name))
+    return name[:k] + name[k + 1:]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    value = fn(*args)
+    return value, time.perf_counter() - start
+
+
+def run(directory, queries=200, seed=0):
+    """
+    Time loading and searching the data in directory. Returns a report dict.
+    """
+    report = {"directory": directory, "queries": queries, "seed": seed}
+
+    _, elapsed = timed(degrees.load_data, directory, False)
+    report["load_csv_s"] = elapsed
+    report["peak_mb_after_load"] = peak_memory_mb()
+    # Writes the snapshot if there is none yet, so the next load can map it
+    degrees.load_data(directory)
+    _, elapsed = timed(degrees.load_data, directory)
+    report["load_snapshot_s"] = elapsed
+
+    # Queries are drawn from people in at least one movie, in id order so
+    # the same seed gives the same queries on every implementation
+    graph = degrees.graph
+    rng = random.Random(seed)
+    people = sorted(graph.person_ids[person]
+                    for person in range(len(graph.person_ids))
+                    if graph.degree(person))
+    sample = [rng.choice(people) for _ in range(queries)]
+    pairs = [(rng.choice(people), rng.choice(people)) for _ in range(queries)]
+    misspelled = [misspell(graph.person_names[graph.person_index(person)], rng)
+                  for person in sample]
+
+    report["neighbors_for_person"] = percentiles(
+        [timed(degrees.neighbors_for_person, person)[1] for person in sample]
+    )
+
+    _, elapsed = timed(degrees.name_index.build)
+    report["name_index_build_s"] = elapsed
+    report["resolve_misspelled"] = percentiles(
+        [timed(degrees.name_index.resolve, name)[1] for name in misspelled]
+    )
+
+    durations = []
+    lengths = []
+    for source, target in pairs:
+        path, elapsed = timed(degrees.shortest_path, source, target)
+        durations.append(elapsed)
+        lengths.append(None if path is None else len(path))
+    report["shortest_path"] = percentiles(durations)
+    connected = [length for length in lengths if length is not None]
+    report["connected_pairs"] = len(connected)
+    report["mean_degrees"] = (sum(connected) / len(connected)
+                              if connected else None)
+
+    report["peak_mb"] = peak_memory_mb()
+    return report
+
+
+def compare(report, baseline, tolerance=0.2, floor_ms=0.05):
+    """
+    Yields a line for every timing in report that is more than `tolerance`
+    slower than in baseline. Latencies that moved by less than floor_ms are
+    treated as timer noise.
+    """
+    for key, value in report.items():
+        old = baseline.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            for stat in ("p50_ms", "p99_ms"):
+                if stat in value and old.get(stat):
+                    ratio = value[stat] / old[stat]
+                    if ratio > 1 + tolerance and value[stat] - old[stat] > floor_ms:
+                        yield f"{key} {stat}: {old[stat]:.3f} -> {value[stat]:.3f} ({ratio:.2f}x)"
+        elif key.endswith("_s") and isinstance(old, (int, float)) and old:
+            ratio = value / old
+            if ratio > 1 + tolerance:
+                yield f"{key}: {old:.3f} -> {value:.3f} ({ratio:.2f}x)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark degrees.")
+    parser.add_argument("command", choices=["generate", "run"])
+    parser.add_argument("directory")
+    parser.add_argument("--edges", type=int, default=100000,
+                        help="star rows to generate")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--baseline", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        (people, movies, stars), elapsed = timed(
+            generate, args.directory, args.edges, args.seed
+        )
+        print(f"Wrote {people} people, {movies} movies and {stars} stars "
+              f"in {elapsed:.1f}s.")
+        return
+
+    report = run(args.directory, args.queries, args.seed)
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = list(compare(report, json.load(f)))
+        for line in regressions:
+            print(f"Regression: {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,91 @@
-import csv
 import sys
 
+import snapshot
+from graph import Graph, MoviesView, NamesView, PeopleView
+from landmarks import LandmarkIndex
+from name_index import NameIndex
+from trees import TreeCache
 from util import Node, StackFrontier, QueueFrontier
 
+# Co-star graph with people and movies interned to integer indexes
+graph = Graph()
+
 # Maps names to a set of corresponding person_ids
-names = {}
+names = NamesView(graph)
 
 # Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+people = PeopleView(graph)
 
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+movies = MoviesView(graph)
+
+# Prefix and trigram index over names, built on first fuzzy lookup
+name_index = NameIndex(graph)
+
+# Search trees from recently queried sources
+trees = TreeCache(graph)
+
+# Landmark distance index, if one has been built for the loaded data
+landmarks = None
 
+# Fingerprint of the journal replayed by load_data, if there was one
+journal = None
 
-def load_data(directory):
+
+def load_data(directory, use_snapshot=True):
     """
     Load data from CSV files into memory.
+
+    The compiled graph is also saved as a binary snapshot next to the CSV
+    files, and later runs memory-map that snapshot instead of parsing the
+    CSV files again, for as long as the files are unchanged. Rows journaled
+    by `ingest` are replayed on top, and a landmark index built by
+    `python landmarks.py build` is then picked up if it was built from the
+    same files and journal.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    global landmarks, journal
+    trees.clear()
+    name_index.clear()
+    landmarks = None
+    journal = None
+    if not (use_snapshot and snapshot.load(graph, directory)):
+        graph.load_csv(directory)
+        if use_snapshot:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
+                snapshot.save(graph, directory)
+            except OSError:
                 pass
+    if use_snapshot:
+        people, movies, stars, journal = snapshot.read_journal(directory)
+        if people or movies or stars:
+            ingest(people, movies, stars)
+    # Loaded after the replay, so only live ingests unload it
+    landmarks = LandmarkIndex.load(graph, directory, journal)
+
+
+def ingest(people=(), movies=(), stars=(), directory=None):
+    """
+    Add (id, name, birth) people, (id, title, year) movies and
+    (person_id, movie_id) stars to the loaded data without reloading it.
+
+    Cached search trees that the new co-star edges would change are
+    dropped, and the landmark index is unloaded if any edges were added,
+    since its bounds may no longer hold. If a directory is given, the rows
+    are also journaled next to its snapshot so later loads include them.
+    """
+    global landmarks
+    people = list(people)
+    movies = list(movies)
+    stars = list(stars)
+    first_added = len(graph.person_ids)
+    edges = graph.extend(people, movies, stars)
+    for person in range(first_added, len(graph.person_ids)):
+        name_index.add(person)
+    if edges:
+        trees.invalidate(edges)
+        landmarks = None
+    if directory is not None:
+        snapshot.append_journal(directory, people, movies, stars)
 
 
 def main():
@@ -84,13 +120,22 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=True):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    By default the search runs on the compiled graph, growing frontiers
+    from both ends until they meet; pass `bidirectional=False` for a plain
+    breadth-first search from the source. When a landmark index is loaded,
+    pairs it proves disconnected are answered without searching.
     """
+    if bidirectional:
+        if landmarks is not None and not landmarks.may_connect(source, target):
+            return None
+        return graph.shortest_path(source, target)
 
     frontier = QueueFrontier()
     frontier.add(Node(state=source, parent=None, action=None))
@@ -115,7 +160,40 @@ def shortest_path(source, target):
             if neighbor_id not in explored and not frontier.contains_state(neighbor_id):
                 frontier.add(Node(state=neighbor_id, parent=node, action=movie_id))
 
-    raise NotImplementedError
+    return None
+
+
+def path_from_source(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, using a cached search tree
+    grown from the source.
+
+    The first query from a source searches the whole graph; later queries
+    from the same source only walk back through the tree.
+
+    If no possible path, returns None.
+    """
+    source = graph.person_index(source)
+    target = graph.person_index(target)
+    if source is None or target is None:
+        return None
+    steps = trees.get(source).steps_to(target)
+    if steps is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in steps]
+
+
+def degree_histogram(source):
+    """
+    Returns a list whose i-th entry is the number of people
+    exactly i degrees of separation away from the source.
+    """
+    source = graph.person_index(source)
+    if source is None:
+        return None
+    return list(trees.get(source).histogram)
 
 
 def person_id_for_name(name):
@@ -149,11 +227,19 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
-    neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            neighbors.add((movie_id, person_id))
+    person = graph.person_index(person_id)
+    if person is None:
+        raise KeyError(person_id)
+    movie_ids = graph.movie_ids
+    person_ids = graph.person_ids
+    via = graph.via
+    co_stars = graph.neighbors
+
+    # Co-star edges leave out the person, so add their own pairs as well
+    neighbors = {(movie_ids[via[edge]], person_ids[co_stars[edge]])
+                 for edge in graph.edges(person)}
+    for movie in graph.movies_of(person):
+        neighbors.add((movie_ids[movie], person_id))
     return neighbors
 
 
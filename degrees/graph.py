@@ -0,0 +1,532 @@
+import csv
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from itertools import chain
+
+
+class Graph():
+    """
+    Co-star graph with people and movies interned to dense integer indexes.
+
+    People and movies are numbered in order of their IMDb id, so ids are
+    resolved by binary search rather than through a dict. Adjacency is
+    stored in CSR form: the co-stars of person i are
+    neighbors[offsets[i]:offsets[i + 1]], each reached through the movie
+    at the same position in `via`. The stars of every movie and the movies
+    of every person are stored the same way in `cast` and `filmography`.
+
+    People, movies and stars added after compiling with `extend` go into an
+    overlay: ids are appended to the lists and found through dicts, and new
+    co-star edges are appended to `neighbors` and `via` past the compiled
+    edges, listed per person in `extra_edges`.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """
+        Reset the graph to contain no people or movies.
+        """
+        self.person_ids = []
+        self.person_names = []
+        self.person_births = []
+        self.movie_ids = []
+        self.movie_titles = []
+        self.movie_years = []
+
+        # Person indexes sorted by lowercase name, for name lookups
+        self.name_order = array("i")
+
+        self.cast_offsets = array("i", [0])
+        self.cast = array("i")
+        self.filmography_offsets = array("i", [0])
+        self.filmography = array("i")
+        self.offsets = array("i", [0])
+        self.neighbors = array("i")
+        self.via = array("i")
+        self.seal()
+
+    def seal(self):
+        """
+        Treat everything currently in the arrays as compiled, with an empty
+        overlay.
+        """
+        self.compiled_people = len(self.person_ids)
+        self.compiled_movies = len(self.movie_ids)
+        self.compiled_edges = len(self.neighbors)
+
+        # Overlay of people, movies and stars added since compiling
+        self.added_people = {}
+        self.added_movies = {}
+        self.added_names = {}
+        self.extra_cast = {}
+        self.extra_filmography = {}
+        self.extra_edges = {}
+        # Person each appended edge starts from, by position past compiled_edges
+        self.extra_sources = array("i")
+
+    def load_csv(self, directory):
+        """
+        Load people, movies and stars from CSV files and compile the graph.
+        """
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            people = [(row["id"], row["name"], row["birth"])
+                      for row in csv.DictReader(f)]
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            movies = [(row["id"], row["title"], row["year"])
+                      for row in csv.DictReader(f)]
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            stars = [(row["person_id"], row["movie_id"])
+                     for row in csv.DictReader(f)]
+        self.build(people, movies, stars)
+
+    def build(self, people, movies, stars):
+        """
+        Compile the graph from (id, name, birth) people, (id, title, year)
+        movies and (person_id, movie_id) stars. Stars referring to unknown
+        people or movies are skipped, and repeated rows are merged.
+        """
+        self.clear()
+
+        # Later rows win for repeated ids, as with the original dicts
+        people = dict((row[0], row[1:]) for row in people)
+        movies = dict((row[0], row[1:]) for row in movies)
+        self.person_ids = sorted(people)
+        self.movie_ids = sorted(movies)
+        self.person_names = [people[i][0] for i in self.person_ids]
+        self.person_births = [people[i][1] for i in self.person_ids]
+        self.movie_titles = [movies[i][0] for i in self.movie_ids]
+        self.movie_years = [movies[i][1] for i in self.movie_ids]
+        del people, movies
+
+        lower_names = [name.lower() for name in self.person_names]
+        self.name_order = array(
+            "i", sorted(range(len(lower_names)), key=lower_names.__getitem__)
+        )
+        del lower_names
+        self.seal()
+
+        # Encode each (movie, person) pair as one int, so that sorting
+        # groups stars by movie and the set drops repeated rows
+        person_count = len(self.person_ids)
+        pairs = set()
+        for person_id, movie_id in stars:
+            person = self.person_index(person_id)
+            movie = self.movie_index(movie_id)
+            if person is not None and movie is not None:
+                pairs.add(movie * person_count + person)
+        self.compile(sorted(pairs))
+
+    def compile(self, pairs):
+        """
+        Fill the CSR arrays from sorted movie * person_count + person keys.
+        """
+        person_count = len(self.person_ids)
+        movie_count = len(self.movie_ids)
+
+        # Stars of each movie
+        cast_offsets = array("i", [0]) * (movie_count + 1)
+        cast = array("i", [0]) * len(pairs)
+        for k, key in enumerate(pairs):
+            movie, person = divmod(key, person_count)
+            cast[k] = person
+            cast_offsets[movie + 1] += 1
+        for movie in range(movie_count):
+            cast_offsets[movie + 1] += cast_offsets[movie]
+
+        # Movies of each person, and how many co-star entries they need
+        film_counts = array("i", [0]) * person_count
+        degrees = array("i", [0]) * person_count
+        for movie in range(movie_count):
+            start, end = cast_offsets[movie], cast_offsets[movie + 1]
+            for k in range(start, end):
+                film_counts[cast[k]] += 1
+                degrees[cast[k]] += end - start - 1
+        filmography_offsets = prefix_sums(film_counts)
+        offsets = prefix_sums(degrees)
+
+        filmography = array("i", [0]) * len(pairs)
+        neighbors = array("i", [0]) * offsets[-1]
+        via = array("i", [0]) * offsets[-1]
+        film_cursor = filmography_offsets[:-1]
+        cursor = offsets[:-1]
+        for movie in range(movie_count):
+            start, end = cast_offsets[movie], cast_offsets[movie + 1]
+            movie_cast = cast[start:end]
+            movie_via = array("i", [movie]) * (end - start - 1)
+            for k, person in enumerate(movie_cast):
+                filmography[film_cursor[person]] = movie
+                film_cursor[person] += 1
+                position = cursor[person]
+                cursor[person] = position + end - start - 1
+                # Slice assignment copies the co-stars in C, not per entry
+                neighbors[position:cursor[person]] = (movie_cast[:k]
+                                                      + movie_cast[k + 1:])
+                via[position:cursor[person]] = movie_via
+
+        self.cast_offsets = cast_offsets
+        self.cast = cast
+        self.filmography_offsets = filmography_offsets
+        self.filmography = filmography
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.via = via
+        self.seal()
+
+    def extend(self, people=(), movies=(), stars=()):
+        """
+        Add (id, name, birth) people, (id, title, year) movies and
+        (person_id, movie_id) stars without recompiling. Rows for ids already
+        in the graph, stars already recorded and stars referring to unknown
+        people or movies are skipped.
+
+        Returns the new co-star edges as (person, co-star) index pairs.
+        """
+        for person_id, name, birth in people:
+            if self.person_index(person_id) is None:
+                person = len(self.person_ids)
+                self.person_ids.append(person_id)
+                self.person_names.append(name)
+                self.person_births.append(birth)
+                self.added_people[person_id] = person
+                self.added_names.setdefault(name.lower(), []).append(person)
+
+        for movie_id, title, year in movies:
+            if self.movie_index(movie_id) is None:
+                self.added_movies[movie_id] = len(self.movie_ids)
+                self.movie_ids.append(movie_id)
+                self.movie_titles.append(title)
+                self.movie_years.append(year)
+
+        added = []
+        for person_id, movie_id in stars:
+            person = self.person_index(person_id)
+            movie = self.movie_index(movie_id)
+            if person is None or movie is None or movie in self.movies_of(person):
+                continue
+            for other in self.stars_of(movie):
+                self.add_edge(person, other, movie)
+                self.add_edge(other, person, movie)
+                added.append((person, other))
+            self.extra_cast.setdefault(movie, []).append(person)
+            self.extra_filmography.setdefault(person, []).append(movie)
+        return added
+
+    def add_edge(self, person, neighbor, movie):
+        # Snapshots map the arrays read-only, so copy them before the first
+        # append, and only then, so loads with nothing to add stay mapped
+        self.neighbors = writable(self.neighbors)
+        self.via = writable(self.via)
+        edge = len(self.neighbors)
+        self.neighbors.append(neighbor)
+        self.via.append(movie)
+        self.extra_sources.append(person)
+        self.extra_edges.setdefault(person, []).append(edge)
+
+    def edges(self, person):
+        """
+        Returns the positions of a person's co-star edges in `neighbors` and
+        `via`, including edges added since compiling.
+        """
+        if person < self.compiled_people:
+            edges = range(self.offsets[person], self.offsets[person + 1])
+        else:
+            edges = range(0)
+        extra = self.extra_edges.get(person)
+        if extra:
+            return chain(edges, extra)
+        return edges
+
+    def degree(self, person):
+        """
+        Returns the number of co-star edges of a person.
+        """
+        count = len(self.extra_edges.get(person, ()))
+        if person < self.compiled_people:
+            count += self.offsets[person + 1] - self.offsets[person]
+        return count
+
+    def movies_of(self, person):
+        """
+        Returns the movie indexes a person starred in.
+        """
+        movies = []
+        if person < self.compiled_people:
+            start = self.filmography_offsets[person]
+            end = self.filmography_offsets[person + 1]
+            movies = [self.filmography[k] for k in range(start, end)]
+        return movies + self.extra_filmography.get(person, [])
+
+    def stars_of(self, movie):
+        """
+        Returns the person indexes starring in a movie.
+        """
+        people = []
+        if movie < self.compiled_movies:
+            start = self.cast_offsets[movie]
+            end = self.cast_offsets[movie + 1]
+            people = [self.cast[k] for k in range(start, end)]
+        return people + self.extra_cast.get(movie, [])
+
+    def person_index(self, person_id):
+        """
+        Returns the index of an IMDb person id, or None if unknown.
+        """
+        person = find(self.person_ids, person_id, self.compiled_people)
+        if person is None:
+            return self.added_people.get(person_id)
+        return person
+
+    def movie_index(self, movie_id):
+        """
+        Returns the index of an IMDb movie id, or None if unknown.
+        """
+        movie = find(self.movie_ids, movie_id, self.compiled_movies)
+        if movie is None:
+            return self.added_movies.get(movie_id)
+        return movie
+
+    def people_named(self, name):
+        """
+        Returns the indexes of every person whose name matches, ignoring case.
+        """
+        key = name.lower()
+        lower_name = self.lower_name
+        start = bisect_left(self.name_order, key, key=lower_name)
+        end = bisect_right(self.name_order, key, lo=start, key=lower_name)
+        return ([self.name_order[k] for k in range(start, end)]
+                + self.added_names.get(key, []))
+
+    def lower_name(self, person):
+        return self.person_names[person].lower()
+
+    def source_of(self, edge):
+        """
+        Returns the person whose adjacency list holds a co-star edge.
+        """
+        if edge >= self.compiled_edges:
+            return self.extra_sources[edge - self.compiled_edges]
+        return bisect_right(self.offsets, edge) - 1
+
+    def shortest_path(self, source, target):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, given as IMDb ids.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index(source)
+        target = self.person_index(target)
+        if source is None or target is None:
+            return None
+        steps = self.search(source, target)
+        if steps is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in steps]
+
+    def search(self, source, target):
+        """
+        Bidirectional BFS between two person indexes. Returns a list of
+        (movie, person) index pairs, or None if they are not connected.
+
+        Each step expands one full layer of whichever side has the smaller
+        frontier. Parents are recorded as positions in the CSR arrays, so
+        expanding a person allocates nothing beyond the frontier itself.
+        """
+        if source == target:
+            return []
+
+        # Maps person to the co-star edge that reached it, or -1 for a root
+        forward = {source: -1}
+        backward = {target: -1}
+        forward_layer = [source]
+        backward_layer = [target]
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self.expand(
+                    forward_layer, forward, backward
+                )
+            else:
+                backward_layer, meeting = self.expand(
+                    backward_layer, backward, forward
+                )
+            if meeting is not None:
+                return self.join(meeting, forward, backward)
+
+        return None
+
+    def expand(self, layer, parents, other_parents):
+        """
+        Expands every person in a BFS layer. Returns the next layer and the
+        person where this search meets the other one with the shortest
+        joined path (or None).
+        """
+        edges = self.edges
+        neighbors = self.neighbors
+        next_layer = []
+        meeting = None
+        best = None
+        for person in layer:
+            for edge in edges(person):
+                neighbor = neighbors[edge]
+                if neighbor in parents:
+                    continue
+                parents[neighbor] = edge
+                next_layer.append(neighbor)
+                if neighbor in other_parents:
+                    length = self.depth(neighbor, other_parents)
+                    if best is None or length < best:
+                        best = length
+                        meeting = neighbor
+        return next_layer, meeting
+
+    def depth(self, person, parents):
+        """
+        Returns the number of steps from a person to the root of a parent map.
+        """
+        length = 0
+        while parents[person] != -1:
+            person = self.source_of(parents[person])
+            length += 1
+        return length
+
+    def join(self, meeting, forward, backward):
+        """
+        Joins forward and backward parent maps at a meeting person into a
+        list of (movie, person) index pairs from source to target.
+        """
+        steps = []
+        person = meeting
+        while forward[person] != -1:
+            edge = forward[person]
+            steps.append((self.via[edge], person))
+            person = self.source_of(edge)
+        steps.reverse()
+
+        person = meeting
+        while backward[person] != -1:
+            edge = backward[person]
+            person = self.source_of(edge)
+            steps.append((self.via[edge], person))
+        return steps
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a graph's people in the layout of the original
+    `people` dict: person_id -> {name, birth, movies}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index(person_id)
+        if person is None:
+            raise KeyError(person_id)
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie]
+                       for movie in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a graph's movies in the layout of the original
+    `movies` dict: movie_id -> {title, year, stars}.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index(movie_id)
+        if movie is None:
+            raise KeyError(movie_id)
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person]
+                      for person in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a graph's names in the layout of the original
+    `names` dict: lowercase name -> set of person_ids.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, name):
+        people = self.graph.people_named(name)
+        if not people or name != name.lower():
+            raise KeyError(name)
+        return {self.graph.person_ids[person] for person in people}
+
+    def __iter__(self):
+        previous = None
+        for person in self.graph.name_order:
+            name = self.graph.lower_name(person)
+            if name != previous:
+                if name not in self.graph.added_names:
+                    yield name
+                previous = name
+        yield from self.graph.added_names
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def find(ids, key, hi):
+    """
+    Returns the position of key in the sorted ids[:hi], or None.
+    """
+    i = bisect_left(ids, key, 0, hi)
+    if i < hi and ids[i] == key:
+        return i
+    return None
+
+
+def writable(values):
+    """
+    Returns an int array with the same contents, copying only if values is
+    not already an appendable array.
+    """
+    if isinstance(values, array):
+        return values
+    copy = array("i")
+    copy.frombytes(values.cast("B"))
+    return copy
+
+
+def prefix_sums(counts):
+    """
+    Returns CSR offsets for a sequence of per-row counts.
+    """
+    offsets = array("i", [0]) * (len(counts) + 1)
+    for i, count in enumerate(counts):
+        offsets[i + 1] = offsets[i] + count
+    return offsets
@@ -0,0 +1,46 @@
+import csv
+import os
+import sys
+import time
+
+import degrees
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python ingest.py directory delta_directory")
+    directory, delta = sys.argv[1:]
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    people = read_rows(delta, "people.csv", ("id", "name", "birth"))
+    movies = read_rows(delta, "movies.csv", ("id", "title", "year"))
+    stars = read_rows(delta, "stars.csv", ("person_id", "movie_id"))
+
+    before = len(degrees.graph.neighbors)
+    start = time.perf_counter()
+    degrees.ingest(people, movies, stars, directory=directory)
+    elapsed = time.perf_counter() - start
+    edges = (len(degrees.graph.neighbors) - before) // 2
+    print(f"Ingested {len(people)} people, {len(movies)} movies and "
+          f"{len(stars)} stars ({edges} new co-star pairs) "
+          f"in {1000 * elapsed:.1f}ms.")
+
+
+def read_rows(directory, name, fields):
+    """
+    Returns rows of the given fields from a delta CSV file, or no rows if
+    the delta has no such file.
+    """
+    path = os.path.join(directory, name)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [tuple(row[field] for field in fields)
+                for row in csv.DictReader(f)]
+
+
+if __name__ == "__main__":
+    main()
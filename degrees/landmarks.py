@@ -0,0 +1,275 @@
+"""
+Landmark distance index for degrees.
+
+BFS distances from k high-degree landmark people are stored as one byte per
+person per landmark. By the triangle inequality they give instant bounds on
+the separation of any pair, and prove pairs disconnected without searching.
+
+Usage:
+    python landmarks.py build [directory] [-k K]
+    python landmarks.py evaluate [directory] [--queries N] [--seed S]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import random
+import struct
+import time
+
+import snapshot
+
+MAGIC = b"DEGLAND1"
+VERSION = 1
+INDEX_NAME = "landmarks.index"
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = 255
+
+
+class LandmarkIndex():
+    """
+    BFS distances from landmark people, laid out person-major so that the
+    distances of person p are distances[p * k:(p + 1) * k].
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = list(landmarks)
+        self.distances = distances
+        self.k = len(self.landmarks)
+
+    @classmethod
+    def build(cls, graph, k=16):
+        """
+        Choose the k people with the most co-star edges as landmarks and
+        record BFS distances from each of them.
+        """
+        edges = graph.edges
+        neighbors = graph.neighbors
+        count = len(graph.person_ids)
+        landmarks = sorted(range(count), key=graph.degree, reverse=True)[:k]
+        k = len(landmarks)
+
+        distances = bytearray([UNREACHED]) * (count * k)
+        for i, landmark in enumerate(landmarks):
+            distances[landmark * k + i] = 0
+            layer = [landmark]
+            depth = 0
+            while layer and depth < UNREACHED - 1:
+                depth += 1
+                next_layer = []
+                for person in layer:
+                    for edge in edges(person):
+                        neighbor = neighbors[edge]
+                        if distances[neighbor * k + i] == UNREACHED:
+                            distances[neighbor * k + i] = depth
+                            next_layer.append(neighbor)
+                layer = next_layer
+        return cls(graph, landmarks, distances)
+
+    def vector(self, person):
+        return self.distances[person * self.k:(person + 1) * self.k]
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between two person
+        indexes. Both are None if a landmark proves they are not connected;
+        upper is None if no landmark reaches both.
+        """
+        lower = 0
+        upper = None
+        for a, b in zip(self.vector(source), self.vector(target)):
+            if (a == UNREACHED) != (b == UNREACHED):
+                return None, None
+            if a == UNREACHED:
+                continue
+            lower = max(lower, abs(a - b))
+            if upper is None or a + b < upper:
+                upper = a + b
+        return lower, upper
+
+    def may_connect(self, source, target):
+        """
+        Returns False if the landmarks prove two IMDb person ids are not
+        connected, and True otherwise.
+        """
+        source = self.graph.person_index(source)
+        target = self.graph.person_index(target)
+        if source is None or target is None:
+            return False
+        return self.bounds(source, target)[0] is not None
+
+    def save(self, directory, journal=None):
+        """
+        Write the index next to the CSV files it was built from, with the
+        fingerprint of the journal replayed on top of them, if any.
+        """
+        header = {
+            "version": VERSION,
+            "sources": {name: snapshot.fingerprint(os.path.join(directory, name))
+                        for name in snapshot.SOURCES},
+            "journal": journal,
+            "people": len(self.graph.person_ids),
+            "landmarks": [self.graph.person_ids[p] for p in self.landmarks]
+        }
+        encoded = json.dumps(header).encode("utf-8")
+        path = index_path(directory)
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(encoded)))
+            f.write(encoded)
+            f.write(self.distances)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, graph, directory, journal=None):
+        """
+        Memory-map the index for a graph, or return None if there is no
+        index for the current CSV files in directory and the journal with
+        the given fingerprint replayed on top of them.
+        """
+        try:
+            with open(index_path(directory), "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                length, = struct.unpack("<I", f.read(4))
+                header = json.loads(f.read(length))
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        landmarks = [graph.person_index(p) for p in header.get("landmarks", [])]
+        start = len(MAGIC) + 4 + length
+        size = len(graph.person_ids) * len(landmarks)
+        if (header.get("version") != VERSION
+                or header.get("people") != len(graph.person_ids)
+                or header.get("journal") != journal
+                or None in landmarks
+                or len(data) != start + size
+                or not snapshot.is_fresh(directory, header.get("sources", {}))):
+            data.close()
+            return None
+        return cls(graph, landmarks, memoryview(data)[start:])
+
+
+def index_path(directory):
+    return os.path.join(directory, INDEX_NAME)
+
+
+def breadth_first(graph, source, target):
+    """
+    Returns the distance between two person indexes found by a plain
+    one-sided BFS, or None if they are not connected.
+    """
+    if source == target:
+        return 0
+    edges = graph.edges
+    neighbors = graph.neighbors
+    seen = {source}
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for edge in edges(person):
+                neighbor = neighbors[edge]
+                if neighbor == target:
+                    return depth
+                if neighbor not in seen:
+                    seen.add(neighbor)
+                    next_layer.append(neighbor)
+        layer = next_layer
+    return None
+
+
+def evaluate(index, queries=200, seed=0):
+    """
+    Compare landmark bounds against BFS on random pairs of people with at
+    least one co-star, and time the searches they gate. Returns a dict of
+    summary figures.
+    """
+    graph = index.graph
+    people = [p for p in range(len(graph.person_ids)) if graph.degree(p)]
+    rng = random.Random(seed)
+    pairs = [(rng.choice(people), rng.choice(people)) for _ in range(queries)]
+
+    timings = {"bfs": 0.0, "bidirectional": 0.0, "landmarks": 0.0}
+    exact = 0
+    gaps = []
+    connected = 0
+    for source, target in pairs:
+        start = time.perf_counter()
+        distance = breadth_first(graph, source, target)
+        timings["bfs"] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        graph.search(source, target)
+        timings["bidirectional"] += time.perf_counter() - start
+
+        # As degrees.shortest_path does when an index is loaded
+        start = time.perf_counter()
+        lower, upper = index.bounds(source, target)
+        if lower is not None:
+            graph.search(source, target)
+        timings["landmarks"] += time.perf_counter() - start
+
+        if distance is None:
+            exact += lower is None
+            continue
+        connected += 1
+        if lower is None or lower > distance or (
+                upper is not None and upper < distance):
+            raise AssertionError(f"bounds disagree with BFS on {source}, {target}")
+        if lower == distance == upper:
+            exact += 1
+        if upper is not None:
+            gaps.append(upper - lower)
+
+    return {
+        "queries": queries,
+        "connected": connected,
+        "exact_bounds": exact / queries,
+        "mean_bound_gap": sum(gaps) / len(gaps) if gaps else None,
+        "bfs_ms": 1000 * timings["bfs"] / queries,
+        "bidirectional_ms": 1000 * timings["bidirectional"] / queries,
+        "landmarks_ms": 1000 * timings["landmarks"] / queries,
+        "landmarks_speedup_vs_bfs": timings["bfs"] / timings["landmarks"]
+        if timings["landmarks"] else None
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Landmark distance index.")
+    parser.add_argument("command", choices=["build", "evaluate"])
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-k", type=int, default=16, help="number of landmarks")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    import degrees
+    print("Loading data...")
+    degrees.load_data(args.directory)
+    print("Data loaded.")
+
+    if args.command == "build":
+        start = time.perf_counter()
+        index = LandmarkIndex.build(degrees.graph, args.k)
+        index.save(args.directory, degrees.journal)
+        elapsed = time.perf_counter() - start
+        print(f"Built {index.k} landmarks in {elapsed:.2f}s.")
+    else:
+        index = degrees.landmarks
+        if index is None:
+            index = LandmarkIndex.build(degrees.graph, args.k)
+        for key, value in evaluate(index, args.queries, args.seed).items():
+            print(f"{key}: {value:.3f}" if isinstance(value, float)
+                  else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+import heapq
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import islice
+
+# Birth year hint written after a name, as in "Tom Hanks (1956)"
+BIRTH_HINT = re.compile(r"(.*?)\s*\((\d{4})\)")
+
+# Fuzzy scores this close to the best make a match ambiguous
+NEAR_TIE = 0.05
+
+
+class NameIndex():
+    """
+    Prefix and trigram index over a graph's person names, for ranked
+    lookups of partial or misspelled names without prompting.
+
+    Prefix matches use the graph's name order directly. Fuzzy matches use
+    trigram posting lists over distinct normalized names, built on first use.
+    A fuzzy lookup reads at most about `budget` posting entries to find its
+    candidates, which keeps it fast when names share many common trigrams
+    at the cost of sometimes missing a close match.
+    """
+
+    def __init__(self, graph, threshold=0.5, budget=8192):
+        self.graph = graph
+        self.threshold = threshold
+        self.budget = budget
+        self.clear()
+
+    def clear(self):
+        # Position in graph.name_order where each distinct name starts
+        self.groups = None
+        # Number of trigrams in each distinct name
+        self.sizes = None
+        # Maps trigram -> sorted array of group numbers whose name has it
+        self.postings = None
+        # Maps group -> person for people added to the graph after compiling
+        self.added = {}
+
+    def build(self):
+        graph = self.graph
+        groups = array("i")
+        sizes = array("i")
+        postings = {}
+        previous = None
+        for position, person in enumerate(graph.name_order):
+            name = graph.lower_name(person)
+            if name == previous:
+                continue
+            previous = name
+            group = len(groups)
+            groups.append(position)
+            grams = trigrams(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, array("i")).append(group)
+        groups.append(len(graph.name_order))
+        self.groups = groups
+        self.sizes = sizes
+        self.postings = postings
+        self.added = {}
+        for person in graph.added_people.values():
+            self.add(person)
+
+    def add(self, person):
+        """
+        Index a person added to the graph after it was compiled, as a group
+        of its own. Does nothing until the index has been built.
+        """
+        if self.postings is None:
+            return
+        group = len(self.sizes)
+        self.added[group] = person
+        grams = trigrams(self.graph.lower_name(person))
+        self.sizes.append(len(grams))
+        for gram in grams:
+            self.postings.setdefault(gram, array("i")).append(group)
+
+    def group_name(self, group):
+        return self.graph.lower_name(self.group_people(group)[0])
+
+    def group_people(self, group):
+        if group in self.added:
+            return [self.added[group]]
+        name_order = self.graph.name_order
+        return [name_order[k]
+                for k in range(self.groups[group], self.groups[group + 1])]
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` candidates for a name as
+        (score, movie count, person index) tuples, best first.
+
+        Exact matches score 1, names starting with the query score just
+        below, and other names score by trigram similarity. Trigrams are
+        only consulted when there is no exact match.
+        """
+        if self.postings is None:
+            self.build()
+        key = query.strip().lower()
+        scores = {}
+
+        for person in self.graph.people_named(key):
+            scores[person] = 1.0
+        exact = bool(scores)
+        for person in self.prefixed(key, limit):
+            scores.setdefault(person, 0.99)
+
+        grams = trigrams(key)
+        if grams and not exact and len(scores) < limit:
+            for group, score in self.similar(grams, limit):
+                for person in self.group_people(group):
+                    scores.setdefault(person, score)
+
+        ranked = sorted(((score, self.movie_count(person), person)
+                         for person, score in scores.items()), reverse=True)
+        return ranked[:limit]
+
+    def prefixed(self, prefix, limit):
+        """
+        Returns up to `limit` people whose lowercase name starts with prefix,
+        those in the most movies first. For a prefix that many names share,
+        only the first `budget` of them in name order are ranked.
+        """
+        if not prefix:
+            return []
+        graph = self.graph
+        name_order = graph.name_order
+        start = bisect_left(name_order, prefix, key=graph.lower_name)
+        people = []
+        for k in range(start, min(start + self.budget, len(name_order))):
+            if not graph.lower_name(name_order[k]).startswith(prefix):
+                break
+            people.append(name_order[k])
+        return heapq.nlargest(limit, people, key=self.movie_count)
+
+    def similar(self, grams, limit):
+        """
+        Returns (group, Dice similarity) pairs for names sharing trigrams
+        with the query, scoring at least the threshold.
+
+        A name scoring at least t must share at least t * q / (2 - t) of the
+        query's q trigrams, so it appears in one of the rarest
+        q - that + 1 posting lists. Only those lists are scanned; the common
+        ones are probed by binary search for the resulting candidates. If
+        the scanned lists would hold more than `budget` entries, the search
+        is left to similar_within_budget instead.
+        """
+        postings = self.postings
+        sizes = self.sizes
+        threshold = self.threshold
+        lists = sorted((postings.get(gram, ()) for gram in grams), key=len)
+        needed = max(1, int(threshold * len(grams) / (2 - threshold)))
+        scan = len(grams) - needed + 1
+        if sum(map(len, lists[:scan])) > self.budget:
+            return self.similar_within_budget(grams, lists, limit)
+        counts = Counter()
+        for posting in lists[:scan]:
+            counts.update(posting)
+
+        rest = lists[scan:]
+        results = []
+        for group, common in counts.items():
+            total = len(grams) + sizes[group]
+            if 2 * (common + len(rest)) < threshold * total:
+                continue
+            for posting in rest:
+                i = bisect_left(posting, group)
+                if i < len(posting) and posting[i] == group:
+                    common += 1
+            score = 2 * common / total
+            if score >= threshold:
+                results.append((score, group))
+        results.sort(reverse=True)
+        return [(group, score) for score, group in results[:limit]]
+
+    def similar_within_budget(self, grams, lists, limit):
+        """
+        Like similar, for a query whose rarest posting lists are too long to
+        scan in full, as when names are made of common trigrams.
+
+        Lists are read rarest first until `budget` entries have been read,
+        and only the groups found in the most of them are kept, at most
+        budget // 64 of them or `limit` if that is more. Those are scored
+        by binary search in every list, until they miss too many trigrams
+        to rank. A close match missing from the lists read is not found.
+        """
+        sizes = self.sizes
+        threshold = self.threshold
+        # Trigrams no name has are missed by every candidate
+        lists = [posting for posting in lists if posting]
+        absent = len(grams) - len(lists)
+
+        count = 0
+        read = 0
+        for posting in lists:
+            if read and read + len(posting) > self.budget:
+                break
+            count += 1
+            read += len(posting)
+
+        # Groups seen in at least one, two and three of the lists read
+        once, twice, thrice = set(lists[0]), set(), set()
+        for k in range(1, count):
+            seen = once.intersection(lists[k])
+            thrice |= twice & seen
+            twice |= seen
+            # The last list read is only checked against the others
+            if k < count - 1:
+                once.update(lists[k])
+        # Probing a candidate costs about as much as reading 64 entries
+        probes = max(limit, self.budget // 64)
+        candidates = islice(thrice or twice or once, probes)
+
+        # Heap of the best (score, group) pairs so far; once it is full, a
+        # candidate has to beat the worst of them
+        best = []
+        floor = threshold
+        for group in candidates:
+            total = len(grams) + sizes[group]
+            allowed = len(grams) - floor * total / 2
+            misses = absent
+            for posting in lists:
+                if misses > allowed:
+                    break
+                i = bisect_left(posting, group)
+                if i == len(posting) or posting[i] != group:
+                    misses += 1
+            if misses > allowed:
+                continue
+            entry = (2 * (len(grams) - misses) / total, group)
+            if len(best) < limit:
+                heapq.heappush(best, entry)
+            elif entry > best[0]:
+                heapq.heapreplace(best, entry)
+            if len(best) == limit:
+                floor = max(threshold, best[0][0])
+        best.sort(reverse=True)
+        return [(group, score) for score, group in best]
+
+    def movie_count(self, person):
+        return len(self.graph.movies_of(person))
+
+    def resolve(self, text, birth=None, floor=0.0):
+        """
+        Returns the person_id a possibly messy name most likely refers to,
+        or None, without prompting. See match.
+        """
+        found = self.match(text, birth, floor)
+        return None if found is None else found[0]
+
+    def match(self, text, birth=None, floor=0.0):
+        """
+        Returns (person_id, score, ambiguous) for the person a possibly messy
+        name most likely refers to, or None if no one scores at least floor.
+
+        An exact person_id or name scores 1, otherwise names score as in
+        search. A trailing "(YYYY)" or the birth argument prefers people born
+        that year. Among the best scored people, the one with the most movies
+        wins. The match is ambiguous if anyone else scored the same or, for
+        fuzzy matches, within NEAR_TIE of it.
+        """
+        graph = self.graph
+        text = text.strip()
+        if graph.person_index(text) is not None:
+            return text, 1.0, False
+
+        hint = BIRTH_HINT.fullmatch(text)
+        if hint is not None:
+            text, birth = hint.group(1), hint.group(2)
+
+        candidates = graph.people_named(text)
+        score = 1.0
+        rivals = candidates
+        if not candidates:
+            ranked = self.search(text)
+            if not ranked or ranked[0][0] < floor:
+                return None
+            score = ranked[0][0]
+            candidates = [person for found, _, person in ranked
+                          if found == score]
+            rivals = [person for found, _, person in ranked
+                      if found >= score - NEAR_TIE]
+
+        if birth is not None:
+            born = [person for person in candidates
+                    if graph.person_births[person] == str(birth)]
+            if born:
+                candidates = born
+                rivals = [person for person in rivals
+                          if graph.person_births[person] == str(birth)]
+
+        person = max(candidates, key=self.movie_count)
+        return graph.person_ids[person], score, len(rivals) > 1
+
+
+def normalize(name):
+    """
+    Returns a name lowercased, without accents and with punctuation and
+    runs of spaces collapsed to single spaces.
+    """
+    name = name.casefold()
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in name if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^\w]+", " ", name).split())
+
+
+def trigrams(name):
+    """
+    Returns the set of trigrams of a normalized name, padded so that
+    word starts and ends count.
+    """
+    name = f"  {normalize(name)} "
+    return {name[i:i + 3] for i in range(len(name) - 2)} - {"   "}
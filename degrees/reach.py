@@ -0,0 +1,30 @@
+import sys
+
+import degrees
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python reach.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    source = degrees.person_id_for_name(input("Name: "))
+    if source is None:
+        sys.exit("Person not found.")
+
+    histogram = degrees.degree_histogram(source)
+    everyone = len(degrees.people)
+    connected = sum(histogram) - 1
+    print(f"{connected} people connected to {degrees.people[source]['name']}.")
+    for distance, count in enumerate(histogram[1:], start=1):
+        print(f"{distance}: {count} ({count / everyone:.1%})")
+    unreached = everyone - connected - 1
+    print(f"Not connected: {unreached} ({unreached / everyone:.1%})")
+
+
+if __name__ == "__main__":
+    main()
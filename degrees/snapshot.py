@@ -0,0 +1,202 @@
+"""
+Binary snapshots of a compiled Graph.
+
+A snapshot file starts with a magic string and a JSON header recording the
+size, mtime and SHA-256 of each source CSV file, followed by the graph's
+integer arrays and its string tables. On load the arrays are memory-mapped
+and used in place, so startup costs a few splits of the string tables
+instead of a full CSV parse.
+
+Rows ingested after the snapshot was written are appended to a journal of
+JSON lines next to it and replayed on top of the snapshot when it is loaded.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+
+MAGIC = b"DEGSNAP1"
+VERSION = 1
+SNAPSHOT_NAME = "graph.snapshot"
+JOURNAL_NAME = "graph.journal"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Graph attributes stored as raw int32 arrays
+ARRAYS = ("name_order", "cast_offsets", "cast", "filmography_offsets",
+          "filmography", "offsets", "neighbors", "via")
+
+# Graph attributes stored as NUL-separated UTF-8 string tables
+STRINGS = ("person_ids", "person_names", "person_births",
+           "movie_ids", "movie_titles", "movie_years")
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def fingerprint(path, digest=True):
+    """
+    Returns [size, mtime_ns, sha256] for a file, with the hash left as None
+    unless requested.
+    """
+    stat = os.stat(path)
+    sha = None
+    if digest:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        sha = h.hexdigest()
+    return [stat.st_size, stat.st_mtime_ns, sha]
+
+
+def is_fresh(directory, sources):
+    """
+    Checks recorded fingerprints against the CSV files in a directory.
+    Files whose mtime moved but whose size did not are rehashed, so that
+    touching or copying the data does not force a rebuild.
+    """
+    for name in SOURCES:
+        path = os.path.join(directory, name)
+        try:
+            size, mtime, sha = sources[name]
+            current = fingerprint(path, digest=False)
+        except (KeyError, OSError, ValueError):
+            return False
+        if current[0] != size:
+            return False
+        if current[1] != mtime and fingerprint(path)[2] != sha:
+            return False
+    return True
+
+
+def save(graph, directory):
+    """
+    Write a snapshot of a graph loaded from the CSV files in directory.
+    """
+    header = {
+        "version": VERSION,
+        "byteorder": sys.byteorder,
+        "sources": {name: fingerprint(os.path.join(directory, name))
+                    for name in SOURCES},
+        "arrays": {},
+        "strings": {}
+    }
+
+    # Lay out every section after the header, aligned to 8 bytes
+    sections = []
+    position = 0
+    for name in ARRAYS:
+        data = memoryview(getattr(graph, name)).cast("B")
+        header["arrays"][name] = [position, len(data) // 4]
+        sections.append((position, data))
+        position = align(position + len(data))
+    for name in STRINGS:
+        values = getattr(graph, name)
+        data = "\0".join(values).encode("utf-8")
+        header["strings"][name] = [position, len(data), len(values)]
+        sections.append((position, data))
+        position = align(position + len(data))
+
+    encoded = json.dumps(header).encode("utf-8")
+    start = align(len(MAGIC) + 4 + len(encoded))
+
+    path = snapshot_path(directory)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(encoded)))
+        f.write(encoded)
+        for offset, data in sections:
+            f.write(b"\0" * (start + offset - f.tell()))
+            f.write(data)
+    os.replace(temporary, path)
+
+
+def load(graph, directory):
+    """
+    Memory-map a snapshot into a graph. Returns False, leaving the graph
+    untouched, if there is no usable snapshot for the CSV files in directory.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return False
+            length, = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(length))
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, struct.error):
+        return False
+
+    if (header.get("version") != VERSION
+            or header.get("byteorder") != sys.byteorder
+            or struct.calcsize("i") != 4
+            or not is_fresh(directory, header.get("sources", {}))):
+        data.close()
+        return False
+
+    start = align(len(MAGIC) + 4 + length)
+    view = memoryview(data)
+    values = {}
+    try:
+        for name in ARRAYS:
+            offset, count = header["arrays"][name]
+            offset += start
+            values[name] = view[offset:offset + 4 * count].cast("i")
+        for name in STRINGS:
+            offset, size, count = header["strings"][name]
+            offset += start
+            table = str(view[offset:offset + size], "utf-8").split("\0")
+            values[name] = table if count else []
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    graph.clear()
+    for name, value in values.items():
+        setattr(graph, name, value)
+    graph.seal()
+    return True
+
+
+def append_journal(directory, people=(), movies=(), stars=()):
+    """
+    Append ingested rows to the journal in directory.
+    """
+    with open(os.path.join(directory, JOURNAL_NAME), "a", encoding="utf-8") as f:
+        for row in people:
+            f.write(json.dumps(["person", *row]) + "\n")
+        for row in movies:
+            f.write(json.dumps(["movie", *row]) + "\n")
+        for row in stars:
+            f.write(json.dumps(["star", *row]) + "\n")
+
+
+def read_journal(directory):
+    """
+    Returns the (people, movies, stars) rows journaled in directory, and a
+    fingerprint of the journal they were read from, or None if there is
+    none. Replaying them is harmless if they have since been merged into
+    the CSV files, as rows already in the graph are skipped.
+    """
+    rows = {"person": [], "movie": [], "star": []}
+    try:
+        with open(os.path.join(directory, JOURNAL_NAME), "rb") as f:
+            data = f.read()
+    except OSError:
+        data = b""
+    for line in data.decode("utf-8", "replace").splitlines():
+        try:
+            kind, *row = json.loads(line)
+            rows[kind].append(tuple(row))
+        except (KeyError, TypeError, ValueError):
+            # A partly written last line from an interrupted append
+            continue
+    journal = [len(data), hashlib.sha256(data).hexdigest()] if data else None
+    return rows["person"], rows["movie"], rows["star"], journal
+
+
+def align(position):
+    return (position + 7) & ~7
@@ -0,0 +1,129 @@
+import threading
+from array import array
+from collections import OrderedDict
+
+# Parent markers for people that are not reached through a co-star edge
+UNREACHED = -1
+ROOT = -2
+
+
+class SearchTree():
+    """
+    Breadth-first search tree grown from one person over the whole graph.
+
+    parents[person] holds the CSR position of the co-star edge that first
+    reached that person, so a path to any target is a walk back to the root.
+    histogram[d] counts the people at distance d from the source.
+    """
+
+    def __init__(self, graph, source):
+        self.graph = graph
+        self.source = source
+        self.parents = array("i", [UNREACHED]) * len(graph.person_ids)
+        self.parents[source] = ROOT
+        self.histogram = [1]
+
+        edges = graph.edges
+        neighbors = graph.neighbors
+        parents = self.parents
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for edge in edges(person):
+                    neighbor = neighbors[edge]
+                    if parents[neighbor] == UNREACHED:
+                        parents[neighbor] = edge
+                        next_layer.append(neighbor)
+            if next_layer:
+                self.histogram.append(len(next_layer))
+            layer = next_layer
+
+    def reached(self, person):
+        return person < len(self.parents) and self.parents[person] != UNREACHED
+
+    def distance(self, person):
+        """
+        Returns the number of steps from the source to a person,
+        or None if they are not connected.
+        """
+        if not self.reached(person):
+            return None
+        length = 0
+        while self.parents[person] != ROOT:
+            person = self.graph.source_of(self.parents[person])
+            length += 1
+        return length
+
+    def steps_to(self, target):
+        """
+        Returns the list of (movie, person) index pairs from the source to
+        a target, or None if they are not connected.
+        """
+        if not self.reached(target):
+            return None
+        steps = []
+        person = target
+        while self.parents[person] != ROOT:
+            edge = self.parents[person]
+            steps.append((self.graph.via[edge], person))
+            person = self.graph.source_of(edge)
+        steps.reverse()
+        return steps
+
+    def shortened_by(self, person, other):
+        """
+        Checks whether a new co-star edge would change this tree: it does
+        if it connects people more than one layer apart, or joins a reached
+        person to an unreached one.
+        """
+        a = self.distance(person)
+        b = self.distance(other)
+        if a is None or b is None:
+            return (a is None) != (b is None)
+        return abs(a - b) > 1
+
+
+class TreeCache():
+    """
+    Least recently used cache of search trees, keyed by source person.
+    """
+
+    def __init__(self, graph, capacity=16):
+        self.graph = graph
+        self.capacity = capacity
+        self.trees = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, source):
+        """
+        Returns the search tree for a source person index, growing it
+        if it is not cached.
+        """
+        with self.lock:
+            tree = self.trees.get(source)
+            if tree is not None:
+                self.trees.move_to_end(source)
+                return tree
+
+        tree = SearchTree(self.graph, source)
+        with self.lock:
+            self.trees[source] = tree
+            self.trees.move_to_end(source)
+            while len(self.trees) > self.capacity:
+                self.trees.popitem(last=False)
+        return tree
+
+    def invalidate(self, edges):
+        """
+        Drop cached trees that any of the new (person, co-star) edges
+        would change.
+        """
+        with self.lock:
+            for source, tree in list(self.trees.items()):
+                if any(tree.shortened_by(a, b) for a, b in edges):
+                    del self.trees[source]
+
+    def clear(self):
+        with self.lock:
+            self.trees.clear()
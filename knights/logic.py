@@ -1,7 +1,66 @@
+import functools
 import itertools
+import operator
+import weakref
+
+import sat
+
+# Method "bitset" evaluates up to 2 ** BITSET_CHUNK assignments at once
+BITSET_CHUNK = 20
+
+# Which of the 64 assignments in a word make each of the first six symbols
+# true
+WORD_PATTERNS = [0xAAAAAAAAAAAAAAAA, 0xCCCCCCCCCCCCCCCC, 0xF0F0F0F0F0F0F0F0,
+                 0xFF00FF00FF00FF00, 0xFFFF0000FFFF0000, 0xFFFFFFFF00000000]
 
 
 class Sentence():
+    """
+    Immutable logical sentence.
+
+    Sentences are hash-consed: building a sentence equal to a live one
+    returns that one, so equal subformulas share a single node. Each node
+    keeps its hash, and its symbols once asked for.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    # Every live sentence, keyed by its type and what it is built from
+    interned = weakref.WeakValueDictionary()
+
+    def __new__(cls, *args):
+        sentence = object.__new__(cls)
+        object.__setattr__(sentence, "_symbols", None)
+        return sentence
+
+    @classmethod
+    def intern(cls, key, **fields):
+        """
+        Returns the live sentence of this type with key, or a new one with
+        the given fields if there is none.
+        """
+        key = (cls,) + key
+        sentence = Sentence.interned.get(key)
+        if sentence is None:
+            sentence = Sentence.__new__(cls)
+            for name, value in fields.items():
+                object.__setattr__(sentence, name, value)
+            object.__setattr__(sentence, "_hash", hash(key))
+            Sentence.interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("logical sentences are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("logical sentences are immutable")
+
+    def __reduce__(self):
+        return (type(self), self.operands())
+
+    def operands(self):
+        """Returns the sentences the logical sentence is built from."""
+        return ()
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -13,7 +72,75 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns a frozenset of all symbols, computed only once."""
+        if self._symbols is None:
+            object.__setattr__(self, "_symbols", frozenset().union(
+                *[operand.symbol_set() for operand in self.operands()]
+            ))
+        return self._symbols
+
+    def encode(self, encoder):
+        """Returns a SAT literal equivalent to the logical sentence."""
+        raise Exception("nothing to encode")
+
+    def expression(self, index, operands):
+        """
+        Returns Python source for the logical sentence in terms of the
+        names of its operands' values, on a sequence v of booleans where
+        v[index[name]] is the value of symbol name.
+        """
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the logical sentence on a sequence of
+        booleans, one for each symbol name in symbols, in the same order.
+
+        The function body is flat, one assignment per distinct compound
+        subsentence in the order they are needed, so its size and depth do
+        not depend on how deeply the sentence is nested.
+        """
+        index = {symbol: i for i, symbol in enumerate(symbols)}
+        missing = self.symbols() - index.keys()
+        if missing:
+            raise Exception(f"variable {missing.pop()} not in symbols")
+
+        names = {}
+        lines = []
+        stack = [(self, False)]
+        while stack:
+            sentence, ready = stack.pop()
+            if sentence in names:
+                continue
+            operands = sentence.operands()
+            if not ready:
+                stack.append((sentence, True))
+                stack.extend((operand, False) for operand in reversed(operands))
+                continue
+            source = sentence.expression(
+                index, [names[operand] for operand in operands]
+            )
+            if operands:
+                names[sentence] = f"t{len(lines)}"
+                lines.append(f"    t{len(lines)} = {source}\n")
+            else:
+                names[sentence] = source
+
+        namespace = {}
+        exec("def evaluate(v):\n" + "".join(lines)
+             + f"    return {names[self]}\n", namespace)
+        return namespace["evaluate"]
+
+    def bitset(self, columns, full):
+        """
+        Returns the bit-vector of the assignments that make the logical
+        sentence true, given the bit-vector columns[name] of each symbol
+        and full with every bit set.
+        """
+        raise Exception("nothing to evaluate")
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +170,19 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        return cls.intern((name,), name=name, _symbols=frozenset((name,)))
+
+    def __reduce__(self):
+        return (Symbol, (self.name,))
 
     def __eq__(self, other):
         return isinstance(other, Symbol) and self.name == other.name
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -65,20 +196,31 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def encode(self, encoder):
+        return encoder.variable(self.name)
+
+    def expression(self, index, operands):
+        return f"v[{index[self.name]}]"
+
+    def bitset(self, columns, full):
+        try:
+            return columns[self.name]
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        return cls.intern((operand,), operand=operand)
 
     def __eq__(self, other):
         return isinstance(other, Not) and self.operand == other.operand
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -89,23 +231,32 @@ class Not(Sentence):
     def formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def operands(self):
+        return (self.operand,)
+
+    def encode(self, encoder):
+        return -encoder.literal(self.operand)
+
+    def expression(self, index, operands):
+        return f"not {operands[0]}"
+
+    def bitset(self, columns, full):
+        return self.operand.bitset(columns, full) ^ full
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        return cls.intern(conjuncts, conjuncts=conjuncts)
 
     def __eq__(self, other):
         return isinstance(other, And) and self.conjuncts == other.conjuncts
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,9 +264,12 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
-    def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+    def with_conjunct(self, conjunct):
+        """
+        Returns a new conjunction with conjunct added at the end, leaving
+        this one unchanged.
+        """
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
@@ -126,23 +280,36 @@ class And(Sentence):
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def operands(self):
+        return self.conjuncts
+
+    def encode(self, encoder):
+        return encoder.conjunction(
+            [encoder.literal(conjunct) for conjunct in self.conjuncts]
+        )
+
+    def expression(self, index, operands):
+        return " and ".join(operands) if operands else "True"
+
+    def bitset(self, columns, full):
+        return functools.reduce(operator.and_, [
+            conjunct.bitset(columns, full) for conjunct in self.conjuncts
+        ], full)
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        return cls.intern(disjuncts, disjuncts=disjuncts)
 
     def __eq__(self, other):
         return isinstance(other, Or) and self.disjuncts == other.disjuncts
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -157,16 +324,31 @@ class Or(Sentence):
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def operands(self):
+        return self.disjuncts
+
+    def encode(self, encoder):
+        return encoder.disjunction(
+            [encoder.literal(disjunct) for disjunct in self.disjuncts]
+        )
+
+    def expression(self, index, operands):
+        return " or ".join(operands) if operands else "False"
+
+    def bitset(self, columns, full):
+        return functools.reduce(operator.or_, [
+            disjunct.bitset(columns, full) for disjunct in self.disjuncts
+        ], full ^ full)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        return cls.intern((antecedent, consequent),
+                          antecedent=antecedent, consequent=consequent)
 
     def __eq__(self, other):
         return (isinstance(other, Implication)
@@ -174,7 +356,7 @@ class Implication(Sentence):
                 and self.consequent == other.consequent)
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -188,16 +370,28 @@ class Implication(Sentence):
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def operands(self):
+        return (self.antecedent, self.consequent)
+
+    def encode(self, encoder):
+        return encoder.disjunction([-encoder.literal(self.antecedent),
+                                    encoder.literal(self.consequent)])
+
+    def expression(self, index, operands):
+        return f"not {operands[0]} or {operands[1]}"
+
+    def bitset(self, columns, full):
+        return ((self.antecedent.bitset(columns, full) ^ full)
+                | self.consequent.bitset(columns, full))
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern((left, right), left=left, right=right)
 
     def __eq__(self, other):
         return (isinstance(other, Biconditional)
@@ -205,7 +399,7 @@ class Biconditional(Sentence):
                 and self.right == other.right)
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -221,12 +415,166 @@ class Biconditional(Sentence):
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+    def operands(self):
+        return (self.left, self.right)
+
+    def encode(self, encoder):
+        return encoder.equivalence(encoder.literal(self.left),
+                                   encoder.literal(self.right))
+
+    def expression(self, index, operands):
+        return f"{operands[0]} == {operands[1]}"
+
+    def bitset(self, columns, full):
+        return (self.left.bitset(columns, full)
+                ^ self.right.bitset(columns, full) ^ full)
+
+
+class Encoder():
+    """
+    Tseitin encoding of logical sentences into clauses of a SAT solver.
+
+    Every symbol gets a solver variable, and every compound subsentence a
+    new variable with clauses making it equivalent to the subsentence, so
+    the clauses grow linearly with the sentences. Equal subsentences are
+    encoded once.
+    """
+
+    def __init__(self, solver=None):
+        self.solver = sat.Solver() if solver is None else solver
+        self.variables = {}
+        self.literals = {}
+        self.true = None
+
+    def variable(self, name):
+        """Returns the solver variable for the symbol called name."""
+        variable = self.variables.get(name)
+        if variable is None:
+            variable = self.variables[name] = self.solver.new_variable()
+        return variable
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence, encoding it if new."""
+        literal = self.literals.get(sentence)
+        if literal is None:
+            literal = self.literals[sentence] = sentence.encode(self)
+        return literal
+
+    def constant(self):
+        """Returns a literal that is always true."""
+        if self.true is None:
+            self.true = self.solver.new_variable()
+            self.solver.add_clause([self.true])
+        return self.true
+
+    def conjunction(self, literals):
+        if not literals:
+            return self.constant()
+        if len(literals) == 1:
+            return literals[0]
+        gate = self.solver.new_variable()
+        for literal in literals:
+            self.solver.add_clause([-gate, literal])
+        self.solver.add_clause([gate] + [-literal for literal in literals])
+        return gate
+
+    def disjunction(self, literals):
+        return -self.conjunction([-literal for literal in literals])
+
+    def equivalence(self, left, right):
+        gate = self.solver.new_variable()
+        self.solver.add_clause([-gate, -left, right])
+        self.solver.add_clause([-gate, left, -right])
+        self.solver.add_clause([gate, left, right])
+        self.solver.add_clause([gate, -left, -right])
+        return gate
+
+    def add(self, sentence):
+        """
+        Adds sentence as a fact. Conjunctions and disjunctions at the top
+        are added as clauses directly, without a variable of their own.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    Knowledge base that grows one sentence at a time.
+
+    Sentences are encoded into a SAT solver as they are added, and queries
+    are answered by solving under an assumption, so the clauses, and what
+    the solver learned from earlier queries, are kept between calls.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.encoder = Encoder()
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """Adds sentence as a fact."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.encoder.add(sentence)
+
+    def knowledge(self):
+        """Returns the conjunction of every sentence added so far."""
+        return And(*self.sentences)
+
+    def consistent(self):
+        """Checks if the sentences added so far can all be true."""
+        return self.encoder.solver.solve()
+
+    def entails(self, query):
+        """Checks if the knowledge base entails query."""
+        Sentence.validate(query)
+        literal = self.encoder.literal(query)
+        return not self.encoder.solver.solve([-literal])
+
+
+def model_check(knowledge, query, method="enumerate"):
+    """
+    Checks if knowledge base entails query.
+
+    method "enumerate" tries every assignment of the symbols, "compiled"
+    does the same with the sentences compiled to a Python function,
+    "bitset" evaluates whole chunks of assignments at once with bitwise
+    operations, and "sat" asks a SAT solver whether knowledge can hold with
+    query false, which scales to far more symbols.
+    """
+    if method == "sat":
+        encoder = Encoder()
+        encoder.add(knowledge)
+        encoder.add(Not(query))
+        return not encoder.solver.solve()
+    elif method == "compiled":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        check = Implication(knowledge, query).compile(symbols)
+        models = itertools.product((True, False), repeat=len(symbols))
+        return all(map(check, models))
+    elif method == "bitset":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        for columns, full, is_empty in bitset_chunks(len(symbols)):
+            columns = dict(zip(symbols, columns))
+            counterexamples = (knowledge.bitset(columns, full)
+                               & (query.bitset(columns, full) ^ full))
+            if not is_empty(counterexamples):
+                return False
+        return True
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -261,3 +609,99 @@ def model_check(knowledge, query):
 
     # Check that knowledge entails query
     return check_all(knowledge, query, symbols, dict())
+
+
+def entailed_symbols(knowledge, candidates, method="compiled"):
+    """
+    Finds every model of knowledge in one pass, then checks each candidate
+    sentence against them. Returns the candidates that hold in every model,
+    in the order given, and the models as dicts from symbol name to value.
+
+    method "compiled" tries every assignment with knowledge compiled to a
+    Python function, and "sat" asks a SAT solver for one model after
+    another, ruling each out before asking again.
+    """
+    candidates = list(candidates)
+    symbols = sorted(set.union(knowledge.symbols(), *[
+        candidate.symbols() for candidate in candidates
+    ]))
+
+    if method == "compiled":
+        check = knowledge.compile(symbols)
+        models = [dict(zip(symbols, values))
+                  for values in itertools.product((True, False),
+                                                  repeat=len(symbols))
+                  if check(values)]
+    elif method == "sat":
+        encoder = Encoder()
+        encoder.add(knowledge)
+        variables = [encoder.variable(symbol) for symbol in symbols]
+        solver = encoder.solver
+        models = []
+        while solver.solve():
+            values = [solver.model[variable] for variable in variables]
+            models.append(dict(zip(symbols, values)))
+            solver.add_clause([-variable if value else variable
+                               for variable, value in zip(variables, values)])
+    else:
+        raise ValueError(f"unknown model checking method {method}")
+
+    entailed = [candidate for candidate in candidates
+                if all(candidate.evaluate(model) for model in models)]
+    return entailed, models
+
+
+def bitset_chunks(count, chunk_bits=BITSET_CHUNK):
+    """
+    Yields (columns, full, is_empty) for each chunk of the 2 ** count
+    assignments of count symbols, a bit per assignment. columns[i] has the
+    bits set for the assignments in the chunk making symbol i true, full has
+    every bit set, and is_empty tells whether a bit-vector has no bits set.
+
+    Bit-vectors are NumPy arrays of 64-bit words if NumPy is installed and
+    a chunk fills at least one word, and Python integers otherwise.
+    """
+    bits = min(count, chunk_bits)
+    numpy = None
+    if bits >= 6:
+        try:
+            import numpy
+        except ImportError:
+            pass
+
+    if numpy is None:
+        size = 1 << bits
+        full = (1 << size) - 1
+        zero = 0
+        low = []
+        for i in range(bits):
+            # Runs of 2 ** i assignments with symbol i false, then true,
+            # doubled until they cover the chunk
+            column = ((1 << (1 << i)) - 1) << (1 << i)
+            length = 2 << i
+            while length < size:
+                column |= column << length
+                length <<= 1
+            low.append(column)
+
+        def is_empty(vector):
+            return not vector
+    else:
+        words = 1 << (bits - 6)
+        ones = numpy.uint64(0xFFFFFFFFFFFFFFFF)
+        full = numpy.full(words, ones, dtype=numpy.uint64)
+        zero = numpy.zeros(words, dtype=numpy.uint64)
+        low = [numpy.full(words, pattern, dtype=numpy.uint64)
+               for pattern in WORD_PATTERNS]
+        positions = numpy.arange(words)
+        low.extend(numpy.where((positions >> (i - 6)) & 1, full, zero)
+                   for i in range(6, bits))
+
+        def is_empty(vector):
+            return not vector.any()
+
+    # Symbols past the chunk hold one value across each chunk
+    for chunk in range(1 << (count - bits)):
+        high = [full if chunk >> i & 1 else zero
+                for i in range(count - bits)]
+        yield low + high, full, is_empty
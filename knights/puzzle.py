@@ -59,9 +59,9 @@ knowledge3 = And(
 def main():
     for puzzle, knowledge in [(0, knowledge0), (1, knowledge1), (2, knowledge2), (3, knowledge3)]:
         print(f"Puzzle {puzzle}")
-        for symbol in [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]:
-            if model_check(knowledge, symbol):
-                print(f"    {symbol}")
+        symbols = [AKnight, AKnave, BKnight, BKnave, CKnight, CKnave]
+        for symbol in entailed_symbols(knowledge, symbols)[0]:
+            print(f"    {symbol}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,313 @@
+"""
+Conflict-driven clause learning SAT solver
+
+Literals are nonzero integers, as in DIMACS: v stands for variable v being
+true and -v for it being false. Clauses are added with add_clause and solve
+decides whether all of them can hold at once, optionally under assumed
+literals. Clauses learned from conflicts are kept between calls, so asking
+many questions of the same clauses gets cheaper as the solver goes.
+"""
+
+
+class Solver():
+    """
+    CDCL solver with two watched literals per clause, unit propagation,
+    first-UIP clause learning with backjumping, activity-based decisions,
+    restarts and pure-literal elimination.
+    """
+
+    def __init__(self):
+        self.variables = 0
+        self.clauses = []
+        self.watches = {}
+
+        # Indexed by variable; index 0 is unused
+        self.values = [None]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+
+        # Assigned literals in order, and where each decision level starts
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+
+        self.increment = 1.0
+        self.ok = True
+        self.model = None
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_variable(self):
+        self.variables += 1
+        variable = self.variables
+        self.values.append(None)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        return variable
+
+    def value(self, literal):
+        """
+        Returns whether literal is true, false, or None if it is unassigned.
+        """
+        value = self.values[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, literals):
+        """
+        Adds the clause that at least one of literals holds. Returns False
+        if the clauses are now known to be unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in dict.fromkeys(literals):
+            while abs(literal) > self.variables:
+                self.new_variable()
+            if -literal in clause:
+                return True
+            value = self.value(literal)
+            if value:
+                return True
+            if value is None:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = literal > 0
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above decision level level, remembering each
+        variable's last value as the phase to try next.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = None
+            self.reasons[variable] = None
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+    def propagate(self):
+        """
+        Assigns every literal forced by a clause with one unassigned
+        literal left. Returns the index of a clause made false, or None.
+        """
+        clauses = self.clauses
+        watches = self.watches
+        value = self.value
+        while self.head < len(self.trail):
+            false = -self.trail[self.head]
+            self.head += 1
+            watching = watches[false]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if value(first):
+                    kept.append(index)
+                    continue
+
+                # Watch another literal that is not false, if there is one
+                for k in range(2, len(clause)):
+                    if value(clause[k]) is not False:
+                        clause[1], clause[k] = clause[k], false
+                        watches[clause[1]].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if value(first) is False:
+                        kept.extend(watching[position + 1:])
+                        watches[false] = kept
+                        return index
+                    self.assign(first, index)
+            watches[false] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Resolves the conflicting clause with the reasons of its literals
+        until one literal of the current level is left. Returns the learned
+        clause, with that literal negated first, and the level to jump back
+        to.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for literal in clause:
+                variable = abs(literal)
+                if variable not in seen and self.levels[variable] > 0:
+                    seen.add(variable)
+                    self.bump(variable)
+                    if self.levels[variable] == level:
+                        pending += 1
+                    else:
+                        learned.append(literal)
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+        learned[0] = -literal
+
+        if len(learned) == 1:
+            return learned, 0
+        # Watch the literal that will be unassigned last
+        deepest = max(range(1, len(learned)),
+                      key=lambda k: self.levels[abs(learned[k])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+
+    def assign_pure(self):
+        """
+        Assigns, each at its own decision level, every unassigned variable
+        that appears with only one sign in the clauses not yet satisfied.
+        """
+        true = set(self.trail)
+        positive = set()
+        negative = set()
+        for clause in self.clauses:
+            if true.isdisjoint(clause):
+                for literal in clause:
+                    if literal > 0:
+                        positive.add(literal)
+                    else:
+                        negative.add(-literal)
+        values = self.values
+        for variable in positive.symmetric_difference(negative):
+            if values[variable] is None:
+                self.trail_limits.append(len(self.trail))
+                self.assign(variable if variable in positive else -variable,
+                            None)
+
+    def decide(self):
+        """
+        Returns the unassigned literal to try next, or None if every
+        variable is assigned.
+        """
+        values = self.values
+        best = None
+        best_activity = -1.0
+        for variable in range(1, self.variables + 1):
+            if values[variable] is None \
+                    and self.activity[variable] > best_activity:
+                best = variable
+                best_activity = self.activity[variable]
+        if best is None:
+            return None
+        return best if self.phases[best] else -best
+
+    def solve(self, assumptions=()):
+        """
+        Checks whether the clauses can all hold with every literal in
+        assumptions true. If so, model[v] holds a value for each variable v.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        assumptions = list(assumptions)
+        for literal in assumptions:
+            while abs(literal) > self.variables:
+                self.new_variable()
+
+        restart_limit = 100
+        conflicts = 0
+        pure_pending = True
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.attach(learned))
+                self.increment /= 0.95
+                continue
+
+            if conflicts >= restart_limit:
+                conflicts = 0
+                restart_limit = int(restart_limit * 1.5)
+                pure_pending = True
+                self.backtrack(0)
+                continue
+
+            # Assumptions take the first decision levels, one each
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            if pure_pending:
+                pure_pending = False
+                self.assign_pure()
+                continue
+
+            literal = self.decide()
+            if literal is None:
+                self.model = list(self.values)
+                return True
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            self.assign(literal, None)
@@ -0,0 +1,149 @@
+"""
+Bitboard Tic Tac Toe engine
+"""
+
+import math
+
+import tictactoe as ttt
+
+# Bit 3 * i + j stands for cell (i, j)
+FULL = 0b111111111
+
+# Rows, columns and diagonals as masks
+LINES = [0b000000111, 0b000111000, 0b111000000,
+         0b001001001, 0b010010010, 0b100100100,
+         0b100010001, 0b001010100]
+
+# The lines through each cell, so a move only checks those
+LINES_THROUGH = [[line for line in LINES if line >> cell & 1]
+                 for cell in range(9)]
+
+# Cells in search order: center, corners, then edges
+ORDER = [4, 0, 2, 6, 8, 1, 3, 5, 7]
+
+# Positions visited by negamax, for benchmarks; never reset
+nodes = 0
+
+
+class Board():
+    """
+    Tic Tac Toe position with each side stored as a 9-bit integer.
+
+    sides[0] holds X's cells and sides[1] O's; turn is the index of the side
+    to move. Moves are made and unmade in place.
+    """
+
+    def __init__(self, x=0, o=0):
+        self.sides = [x, o]
+        self.turn = 0 if bin(x).count("1") == bin(o).count("1") else 1
+
+    @classmethod
+    def from_lists(cls, board):
+        """
+        Returns a Board for a list-of-lists board as used by tictactoe.py.
+        """
+        x = o = 0
+        for i in range(3):
+            for j in range(3):
+                if board[i][j] == ttt.X:
+                    x |= 1 << (3 * i + j)
+                elif board[i][j] == ttt.O:
+                    o |= 1 << (3 * i + j)
+        return cls(x, o)
+
+    def to_lists(self):
+        """
+        Returns the position as a list-of-lists board.
+        """
+        x, o = self.sides
+        return [[ttt.X if x >> (3 * i + j) & 1
+                 else ttt.O if o >> (3 * i + j) & 1
+                 else ttt.EMPTY
+                 for j in range(3)] for i in range(3)]
+
+    def occupied(self):
+        return self.sides[0] | self.sides[1]
+
+    def player(self):
+        return ttt.X if self.turn == 0 else ttt.O
+
+    def make(self, cell):
+        self.sides[self.turn] |= 1 << cell
+        self.turn ^= 1
+
+    def unmake(self, cell):
+        self.turn ^= 1
+        self.sides[self.turn] &= ~(1 << cell)
+
+    def completes_line(self, cell):
+        """
+        Checks whether the last move, on cell, completed a line for the side
+        that made it.
+        """
+        side = self.sides[self.turn ^ 1]
+        for line in LINES_THROUGH[cell]:
+            if side & line == line:
+                return True
+        return False
+
+    def winner(self):
+        for index, side in enumerate(self.sides):
+            for line in LINES:
+                if side & line == line:
+                    return ttt.X if index == 0 else ttt.O
+        return None
+
+    def terminal(self):
+        return self.winner() is not None or self.occupied() == FULL
+
+    def utility(self):
+        win = self.winner()
+        if win == ttt.X:
+            return 1
+        elif win == ttt.O:
+            return -1
+        return 0
+
+
+def negamax(board, alpha, beta):
+    """
+    Returns (value, best cell) for the side to move on a non-terminal
+    board, with value 1 for a win, 0 for a draw and -1 for a loss from that
+    side's point of view. Searches with alpha-beta pruning.
+    """
+    global nodes
+    nodes += 1
+    occupied = board.occupied()
+    best_value = -math.inf
+    best_cell = None
+    for cell in ORDER:
+        if occupied >> cell & 1:
+            continue
+        board.make(cell)
+        if board.completes_line(cell):
+            value = 1
+        elif occupied | 1 << cell == FULL:
+            value = 0
+        else:
+            value = -negamax(board, -beta, -alpha)[0]
+        board.unmake(cell)
+
+        if value > best_value:
+            best_value = value
+            best_cell = cell
+        alpha = max(alpha, value)
+        if alpha >= beta or best_value == 1:
+            break
+    return best_value, best_cell
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on a list-of-lists
+    board, or None if the game is over.
+    """
+    position = Board.from_lists(board)
+    if position.terminal():
+        return None
+    cell = negamax(position, -math.inf, math.inf)[1]
+    return divmod(cell, 3)
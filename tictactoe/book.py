@@ -0,0 +1,69 @@
+"""
+Opening book generator for Tic Tac Toe
+
+Solves every reachable position once and writes the value and optimal
+moves of each one, up to symmetry, to the book read by tictactoe.minimax.
+
+Usage: python book.py [path]
+"""
+
+import sys
+
+import tictactoe as ttt
+
+
+def solve():
+    """
+    Returns a dict mapping the canonical key of every reachable,
+    non-terminal position to (value, mask of optimal cells in the
+    canonical frame).
+    """
+    values = {}
+    entries = {}
+
+    def value(board):
+        key, symmetry = ttt.canonical(board)
+        if key in values:
+            return values[key]
+        if ttt.terminal(board):
+            values[key] = ttt.utility(board)
+            return values[key]
+
+        children = {action: value(ttt.result(board, action))
+                    for action in ttt.actions(board)}
+        if ttt.player(board) == ttt.X:
+            best = max(children.values())
+        else:
+            best = min(children.values())
+
+        moves = 0
+        for action, child in children.items():
+            if child == best:
+                moves |= 1 << ttt.transform_cell(action, symmetry)
+        values[key] = best
+        entries[key] = (best, moves)
+        return best
+
+    value(ttt.initial_state())
+    return entries
+
+
+def write(entries, path=ttt.BOOK_PATH):
+    with open(path, "wb") as f:
+        f.write(ttt.BOOK_MAGIC)
+        for key in sorted(entries):
+            best, moves = entries[key]
+            f.write(ttt.BOOK_RECORD.pack(key, (best + 1) << 9 | moves))
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [path]")
+    path = sys.argv[1] if len(sys.argv) == 2 else ttt.BOOK_PATH
+    entries = solve()
+    write(entries, path)
+    print(f"Wrote {len(entries)} positions to {path}.")
+
+
+if __name__ == "__main__":
+    main()
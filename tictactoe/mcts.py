@@ -0,0 +1,148 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe and m,n,k games
+
+Works with any game offering the functions of tictactoe.py (player,
+actions, result, terminal, utility): the tictactoe module itself or an
+mnk.Game. Each iteration walks down the tree by UCT, adds one node and
+plays a batch of random games from it. The search stops after a fixed
+number of iterations or when its time runs out, so the budget trades
+strength for latency. The tree is kept between moves and reused from the
+position the opponent left.
+"""
+
+import math
+import random
+import time
+
+import tictactoe as ttt
+
+
+class Node():
+    """
+    Position in the search tree.
+
+    total is the sum of random game results from X's point of view over
+    visits games played through this node.
+    """
+
+    def __init__(self, game, board, parent=None, action=None):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.player = game.player(board)
+        self.children = []
+        self.untried = ([] if game.terminal(board)
+                        else sorted(game.actions(board)))
+        self.visits = 0
+        self.total = 0
+
+    def select(self, exploration):
+        """
+        Returns the child with the best upper confidence bound for the
+        player to move here.
+        """
+        sign = 1 if self.player == ttt.X else -1
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            sign * child.total / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)
+        ))
+
+
+class MCTS():
+    """
+    Player that picks moves by Monte Carlo Tree Search.
+
+    Searches for iterations iterations if given, otherwise for time_limit
+    seconds, and always for at least one iteration. Each iteration plays
+    rollouts random games from the new node.
+    """
+
+    def __init__(self, game=ttt, iterations=None, time_limit=1.0,
+                 rollouts=4, exploration=math.sqrt(2), seed=None):
+        if iterations is None and time_limit is None:
+            raise ValueError("MCTS needs an iteration or time budget")
+        if iterations is not None and iterations < 1:
+            raise ValueError(f"iterations must be positive: {iterations}")
+        if time_limit is not None and time_limit <= 0:
+            raise ValueError(f"time_limit must be positive: {time_limit}")
+        self.game = game
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.rollouts = rollouts
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+        self.iterations_run = 0
+
+    def best_move(self, board):
+        """
+        Returns the most visited move for the current player, or None if
+        the game is over.
+        """
+        if self.game.terminal(board):
+            return None
+        self.root = self.reuse(board) or Node(self.game, board)
+        self.root.parent = None
+        self.search()
+        best = max(self.root.children, key=lambda child: child.visits)
+        return best.action
+
+    def reuse(self, board):
+        """
+        Returns the node for board if it is the root or one or two moves
+        below it, so the statistics gathered there are kept.
+        """
+        if self.root is None:
+            return None
+        layer = [self.root]
+        for _ in range(3):
+            for node in layer:
+                if node.board == board:
+                    return node
+            layer = [child for node in layer for child in node.children]
+        return None
+
+    def search(self):
+        deadline = (None if self.time_limit is None
+                    else time.perf_counter() + self.time_limit)
+        self.iterations_run = 0
+        while True:
+            self.iterate()
+            self.iterations_run += 1
+            if self.iterations is not None \
+                    and self.iterations_run >= self.iterations:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+    def iterate(self):
+        game = self.game
+        node = self.root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+
+        if node.untried:
+            action = node.untried.pop(
+                self.rng.randrange(len(node.untried))
+            )
+            child = Node(game, game.result(node.board, action), node, action)
+            node.children.append(child)
+            node = child
+
+        total = sum(self.rollout(node.board) for _ in range(self.rollouts))
+        while node is not None:
+            node.visits += self.rollouts
+            node.total += total
+            node = node.parent
+
+    def rollout(self, board):
+        """
+        Plays random moves from board to the end of the game and returns
+        the utility of the final board.
+        """
+        game = self.game
+        choice = self.rng.choice
+        while not game.terminal(board):
+            board = game.result(board, choice(sorted(game.actions(board))))
+        return game.utility(board)
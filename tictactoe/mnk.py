@@ -0,0 +1,369 @@
+"""
+m,n,k game engine: k in a row on an m by n board
+
+Game offers the same functions as tictactoe.py for list-of-lists boards, so
+the runner and other players can use any board size. Searcher plays it with
+iterative deepening alpha-beta under a time budget, scoring unfinished
+positions by their open lines. Position keeps per-line stone counts up to
+date as moves are made, so both the evaluation and win detection only
+look at the lines through the last move.
+"""
+
+import math
+import random
+import time
+
+from tictactoe import X, O, EMPTY
+
+# Score of a win; wins found sooner score higher
+WIN = 1000000
+
+# Scores above this are forced wins or losses
+DECIDED = WIN - 1000
+
+
+def to_table(value, ply):
+    """
+    Returns value as stored in the transposition table, where forced wins
+    and losses count plies from the stored position rather than the root,
+    so that it holds wherever the position is reached.
+    """
+    if value >= DECIDED:
+        return value + ply
+    if value <= -DECIDED:
+        return value - ply
+    return value
+
+
+def from_table(value, ply):
+    """
+    Returns a transposition table value as seen ply plies from the root.
+    """
+    if value >= DECIDED:
+        return value - ply
+    if value <= -DECIDED:
+        return value + ply
+    return value
+
+
+class Game():
+    """
+    Rules of an m,n,k game: m rows, n columns, k in a row to win.
+    """
+
+    def __init__(self, m=3, n=3, k=3):
+        if not (1 <= k <= max(m, n)):
+            raise ValueError("k must fit on the board")
+        self.m = m
+        self.n = n
+        self.k = k
+        self.size = m * n
+
+        # Every run of k cells along a row, column or diagonal
+        self.windows = []
+        for i in range(m):
+            for j in range(n):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < m and 0 <= end_j < n:
+                        self.windows.append(tuple(
+                            (i + di * step) * n + (j + dj * step)
+                            for step in range(k)
+                        ))
+        self.windows_through = [[] for _ in range(self.size)]
+        for w, window in enumerate(self.windows):
+            for cell in window:
+                self.windows_through[cell].append(w)
+
+        # Cells next to each cell, for move ordering
+        self.neighbors = [
+            [(i + di) * n + (j + dj)
+             for di in (-1, 0, 1) for dj in (-1, 0, 1)
+             if (di or dj) and 0 <= i + di < m and 0 <= j + dj < n]
+            for i in range(m) for j in range(n)
+        ]
+        center_i = (m - 1) / 2
+        center_j = (n - 1) / 2
+        self.centrality = [-abs(i - center_i) - abs(j - center_j)
+                           for i in range(m) for j in range(n)]
+
+        # Score of an open line holding c stones of one side and none of
+        # the other
+        self.weights = [0] + [4 ** c for c in range(1, k + 1)]
+
+        rng = random.Random(0)
+        self.zobrist = [[rng.getrandbits(64) for _ in range(self.size)]
+                        for _ in range(2)]
+
+    def initial_state(self):
+        return [[EMPTY] * self.n for _ in range(self.m)]
+
+    def player(self, board):
+        x_count = sum(row.count(X) for row in board)
+        o_count = sum(row.count(O) for row in board)
+        return O if x_count > o_count else X
+
+    def actions(self, board):
+        return {(i, j) for i in range(self.m) for j in range(self.n)
+                if board[i][j] == EMPTY}
+
+    def result(self, board, action):
+        i, j = action
+        if board[i][j] != EMPTY:
+            raise ValueError("Invalid action")
+        new_board = [row.copy() for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        n = self.n
+        for window in self.windows:
+            first = board[window[0] // n][window[0] % n]
+            if first != EMPTY and all(
+                board[cell // n][cell % n] == first for cell in window
+            ):
+                return first
+        return None
+
+    def terminal(self, board):
+        return (self.winner(board) is not None
+                or all(cell != EMPTY for row in board for cell in row))
+
+    def utility(self, board):
+        win = self.winner(board)
+        if win == X:
+            return 1
+        elif win == O:
+            return -1
+        return 0
+
+    def best_move(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns a move for the current player found within time_limit
+        seconds, or None if the game is over.
+        """
+        return Searcher(self, time_limit, max_depth).best_move(board)
+
+
+class Position():
+    """
+    Mutable m,n,k position with incremental line counts, score and hash.
+
+    counts[side][w] is how many stones side has in window w, and score is
+    the open-line evaluation from X's point of view. won is the side that
+    completed a line, if any.
+    """
+
+    def __init__(self, game, board=None):
+        self.game = game
+        self.cells = [EMPTY] * game.size
+        self.counts = [[0] * len(game.windows), [0] * len(game.windows)]
+        self.score = 0
+        self.hash = 0
+        self.moves = []
+        self.turn = 0
+        self.won = None
+        if board is not None:
+            for i, row in enumerate(board):
+                for j, mark in enumerate(row):
+                    if mark != EMPTY:
+                        self.place(i * game.n + j, 0 if mark == X else 1)
+            self.turn = 1 if len(self.moves) % 2 else 0
+
+    def line_value(self, w):
+        x_count = self.counts[0][w]
+        o_count = self.counts[1][w]
+        if o_count == 0:
+            return self.game.weights[x_count]
+        if x_count == 0:
+            return -self.game.weights[o_count]
+        return 0
+
+    def place(self, cell, side):
+        game = self.game
+        counts = self.counts[side]
+        self.cells[cell] = X if side == 0 else O
+        for w in game.windows_through[cell]:
+            before = self.line_value(w)
+            counts[w] += 1
+            if counts[w] == game.k:
+                self.won = side
+            self.score += self.line_value(w) - before
+        self.hash ^= game.zobrist[side][cell]
+        self.moves.append(cell)
+
+    def make(self, cell):
+        self.place(cell, self.turn)
+        self.turn ^= 1
+
+    def unmake(self):
+        cell = self.moves.pop()
+        self.turn ^= 1
+        side = self.turn
+        counts = self.counts[side]
+        for w in self.game.windows_through[cell]:
+            before = self.line_value(w)
+            counts[w] -= 1
+            self.score += self.line_value(w) - before
+        self.hash ^= self.game.zobrist[side][cell]
+        self.cells[cell] = EMPTY
+        self.won = None
+
+    def full(self):
+        return len(self.moves) == self.game.size
+
+    def ordered_moves(self, first=None):
+        """
+        Returns the empty cells, trying first, then cells touching the most
+        stones, then cells nearest the center.
+        """
+        game = self.game
+        cells = self.cells
+        moves = [cell for cell in range(game.size) if cells[cell] == EMPTY]
+        moves.sort(key=lambda cell: (
+            cell != first,
+            -sum(cells[other] != EMPTY for other in game.neighbors[cell]),
+            -game.centrality[cell]
+        ))
+        return moves
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Searcher():
+    """
+    Iterative deepening negamax with alpha-beta pruning, a transposition
+    table and a time budget per move.
+    """
+
+    # Kinds of value stored in the transposition table
+    EXACT = 0
+    LOWER = 1
+    UPPER = 2
+
+    def __init__(self, game, time_limit=1.0, max_depth=None):
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.table = {}
+        self.nodes = 0
+        self.depth = 0
+        self.deadline = None
+
+    def best_move(self, board):
+        """
+        Returns the best move found for the current player as (i, j), or
+        None if the game is over.
+        """
+        position = Position(self.game, board)
+        if position.won is not None or position.full():
+            return None
+        cell = self.search(position)[0]
+        return divmod(cell, self.game.n)
+
+    def search(self, position):
+        """
+        Deepens the search one ply at a time until the budget runs out, the
+        result is decided or the whole game has been searched. Returns the
+        best cell and value of the last completed depth.
+        """
+        self.nodes = 0
+        self.deadline = (None if self.time_limit is None
+                         else time.perf_counter() + self.time_limit)
+        remaining = self.game.size - len(position.moves)
+        if self.max_depth is not None:
+            remaining = min(self.max_depth, remaining)
+
+        best_cell = position.ordered_moves()[0]
+        best_value = 0
+        self.depth = 0
+        for depth in range(1, remaining + 1):
+            try:
+                best_value, best_cell = self.root(position, depth, best_cell)
+            except SearchTimeout:
+                # Moves are unmade as the exception unwinds, so the last
+                # completed depth stands
+                break
+            self.depth = depth
+            if abs(best_value) >= DECIDED:
+                break
+        return best_cell, best_value
+
+    def root(self, position, depth, first):
+        alpha = -math.inf
+        beta = math.inf
+        best_value = -math.inf
+        best_cell = first
+        for cell in position.ordered_moves(first):
+            position.make(cell)
+            try:
+                value = -self.negamax(position, depth - 1, -beta, -alpha, 1)
+            finally:
+                position.unmake()
+            if value > best_value:
+                best_value = value
+                best_cell = cell
+            alpha = max(alpha, value)
+        return best_value, best_cell
+
+    def negamax(self, position, depth, alpha, beta, ply):
+        """
+        Returns the value of a position for the side to move, searched
+        depth plies deep.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 1023 == 0 \
+                and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if position.won is not None:
+            return -(WIN - ply)
+        if position.full():
+            return 0
+        if depth == 0:
+            return position.score if position.turn == 0 else -position.score
+
+        original_alpha = alpha
+        entry = self.table.get(position.hash)
+        first = None
+        if entry is not None:
+            entry_depth, value, bound, first = entry
+            if entry_depth >= depth:
+                value = from_table(value, ply)
+                if bound == self.EXACT:
+                    return value
+                elif bound == self.LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value
+
+        best_value = -math.inf
+        best_cell = None
+        for cell in position.ordered_moves(first):
+            position.make(cell)
+            try:
+                value = -self.negamax(position, depth - 1, -beta, -alpha,
+                                      ply + 1)
+            finally:
+                position.unmake()
+            if value > best_value:
+                best_value = value
+                best_cell = cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            bound = self.UPPER
+        elif best_value >= beta:
+            bound = self.LOWER
+        else:
+            bound = self.EXACT
+        self.table[position.hash] = (depth, to_table(best_value, ply), bound,
+                                     best_cell)
+        return best_value
@@ -0,0 +1,185 @@
+"""
+Parallel root-split search for m,n,k games
+
+Each root move is searched in its own task on a process pool. Workers share
+the best root value found so far through a multiprocessing.Value, so moves
+searched after a good one start with a tighter alpha bound and prune more.
+Every worker keeps its own transposition table between tasks on the same
+root position, and clears it when given a new one.
+
+Usage:
+    python parallel.py [-m 7] [-n 7] [-k 4] [--depth D] [--workers W]
+"""
+
+import argparse
+import math
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed, wait
+
+import mnk
+
+# Set in each worker process by init_worker
+shared_alpha = None
+# Maps shape -> (searcher, board of the root it is searching)
+searchers = {}
+
+
+def init_worker(alpha):
+    global shared_alpha
+    shared_alpha = alpha
+
+
+def search_root_move(shape, board, cell, depth, time_left):
+    """
+    Searches one root move depth plies deep in a worker. Returns (value,
+    exact, nodes), where exact is False if the value is only an upper bound
+    because the move could not beat the shared alpha, or None if the time
+    ran out.
+    """
+    searcher, root = searchers.get(shape, (None, None))
+    if searcher is None:
+        searcher = mnk.Searcher(mnk.Game(*shape), None)
+    elif root != board:
+        # Entries from earlier roots are seldom reached again, so drop them
+        # rather than let the table grow for as long as the pool lives
+        searcher.table.clear()
+    searchers[shape] = searcher, board
+    searcher.nodes = 0
+    searcher.deadline = (None if time_left is None
+                         else time.perf_counter() + time_left)
+
+    position = mnk.Position(searcher.game, board)
+    alpha = shared_alpha.value
+    position.make(cell)
+    try:
+        value = -searcher.negamax(position, depth - 1, -math.inf, -alpha, 1)
+    except mnk.SearchTimeout:
+        return None
+
+    with shared_alpha.get_lock():
+        if value > shared_alpha.value:
+            shared_alpha.value = value
+    return value, value > alpha, searcher.nodes
+
+
+class ParallelSearcher():
+    """
+    Iterative deepening search that splits each depth's root moves across
+    a pool of worker processes.
+    """
+
+    def __init__(self, game, time_limit=1.0, max_depth=None, workers=None):
+        self.game = game
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.alpha = multiprocessing.Value("d", -math.inf)
+        self.pool = ProcessPoolExecutor(workers, initializer=init_worker,
+                                        initargs=(self.alpha,))
+        self.nodes = 0
+        self.depth = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def best_move(self, board):
+        """
+        Returns the best move found for the current player as (i, j), or
+        None if the game is over.
+        """
+        position = mnk.Position(self.game, board)
+        if position.won is not None or position.full():
+            return None
+        cell = self.search(board, position.ordered_moves())[0]
+        return divmod(cell, self.game.n)
+
+    def search(self, board, moves):
+        """
+        Searches the root moves one depth at a time, best moves of the
+        previous depth first. Returns the best cell and value of the last
+        completed depth.
+        """
+        game = self.game
+        shape = (game.m, game.n, game.k)
+        start = time.perf_counter()
+        remaining = len(moves)
+        if self.max_depth is not None:
+            remaining = min(self.max_depth, remaining)
+
+        best_cell = moves[0]
+        best_value = 0
+        self.nodes = 0
+        self.depth = 0
+        for depth in range(1, remaining + 1):
+            time_left = None
+            if self.time_limit is not None:
+                time_left = self.time_limit - (time.perf_counter() - start)
+                if time_left <= 0:
+                    break
+
+            self.alpha.value = -math.inf
+            futures = {
+                self.pool.submit(search_root_move, shape, board, cell, depth,
+                                 time_left): cell
+                for cell in moves
+            }
+            results = {}
+            for future in as_completed(futures):
+                outcome = future.result()
+                if outcome is None:
+                    break
+                value, exact, nodes = outcome
+                results[futures[future]] = (value, exact)
+                self.nodes += nodes
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            if len(results) < len(moves):
+                break
+
+            # Exact values win ties with upper bounds of the same size
+            moves.sort(key=lambda cell: results[cell], reverse=True)
+            best_cell = moves[0]
+            best_value = results[best_cell][0]
+            self.depth = depth
+            if abs(best_value) >= mnk.DECIDED:
+                break
+        return best_cell, best_value
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare serial and parallel search from an empty board."
+    )
+    parser.add_argument("-m", type=int, default=7, help="rows")
+    parser.add_argument("-n", type=int, default=7, help="columns")
+    parser.add_argument("-k", type=int, default=4, help="stones in a row")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    game = mnk.Game(args.m, args.n, args.k)
+    board = game.initial_state()
+
+    serial = mnk.Searcher(game, None, args.depth)
+    start = time.perf_counter()
+    move = serial.best_move(board)
+    elapsed = time.perf_counter() - start
+    print(f"Serial:   {move} in {elapsed:.2f}s, {serial.nodes} nodes")
+
+    with ParallelSearcher(game, None, args.depth, args.workers) as searcher:
+        start = time.perf_counter()
+        move = searcher.best_move(board)
+        elapsed = time.perf_counter() - start
+        print(f"Parallel: {move} in {elapsed:.2f}s, {searcher.nodes} nodes")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,34 @@
+import argparse
 import pygame
+import random
 import sys
+import threading
 import time
+import traceback
 
+import mcts
 import tictactoe as ttt
 
+parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe.")
+parser.add_argument("--ai", choices=["minimax", "mcts"], default="minimax")
+parser.add_argument("--time", type=float, default=1.0,
+                    help="seconds MCTS thinks per move")
+parser.add_argument("--iterations", type=int,
+                    help="MCTS iterations per move, instead of --time")
+args = parser.parse_args()
+if args.iterations is not None and args.iterations < 1:
+    parser.error("--iterations must be positive")
+if args.time <= 0:
+    parser.error("--time must be positive")
+
+if args.ai == "mcts":
+    choose_move = mcts.MCTS(
+        iterations=args.iterations,
+        time_limit=None if args.iterations is not None else args.time
+    ).best_move
+else:
+    choose_move = ttt.minimax
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -17,9 +42,25 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
+
+def think(board, move):
+    try:
+        move.append(choose_move(board))
+    except Exception:
+        # Report the failure and play a random move rather than leave the
+        # window thinking forever
+        traceback.print_exc()
+        move.append(random.choice(sorted(ttt.actions(board))))
+
+
+# The AI searches on a daemon thread so the window keeps redrawing and can
+# be closed mid-search; the thread puts its move in ai_move when it is done
+ai_move = None
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
 
 while True:
 
@@ -102,21 +143,22 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (pygame.time.get_ticks() // 400 % 3 + 1)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Start the AI search, or play its move once it has finished
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = []
+                threading.Thread(target=think, args=(board, ai_move),
+                                 daemon=True).start()
+            elif ai_move:
+                board = ttt.result(board, ai_move[0])
+                ai_move = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -141,6 +183,7 @@ while True:
                     time.sleep(0.2)
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    ai_move = None
 
     pygame.display.flip()
+    clock.tick(60)
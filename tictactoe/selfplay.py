@@ -0,0 +1,246 @@
+"""
+Headless self-play and benchmarks for the Tic Tac Toe engines
+
+`play` plays full games between two engines through tictactoe.py and
+reports the outcomes, time per move and positions searched per move.
+`compare` plays every engine against a random player from both sides and
+against itself, so engines can be compared on the same games. Reports are
+printed as JSON and can also be written to a JSON file, with every move as
+a row of a CSV file.
+
+Usage:
+    python selfplay.py play [--x ENGINE] [--o ENGINE] [--games N]
+                            [--seed S] [--csv FILE] [--json FILE]
+    python selfplay.py compare [--engines A,B,...] [--games N]
+                               [--seed S] [--csv FILE] [--json FILE]
+"""
+
+import argparse
+import csv
+import json
+import math
+import random
+import time
+
+import bitboard
+import mcts
+import mnk
+import tictactoe as ttt
+
+MNK_GAME = mnk.Game()
+MCTS_PLAYER = mcts.MCTS(iterations=1000, time_limit=None, seed=0)
+
+
+def plain_minimax(board):
+    """
+    Returns (best action, positions visited) by exhaustive minimax with no
+    pruning or caching, as a reference for the faster engines.
+    """
+    visited = 0
+
+    def value(board):
+        nonlocal visited
+        visited += 1
+        if ttt.terminal(board):
+            return ttt.utility(board)
+        values = [value(ttt.result(board, action))
+                  for action in ttt.actions(board)]
+        return max(values) if ttt.player(board) == ttt.X else min(values)
+
+    sign = 1 if ttt.player(board) == ttt.X else -1
+    best = max(sorted(ttt.actions(board)),
+               key=lambda action: sign * value(ttt.result(board, action)))
+    return best, visited
+
+
+def shipped_minimax(board):
+    before = ttt.nodes
+    action = ttt.minimax(board)
+    return action, ttt.nodes - before
+
+
+def alpha_beta(board):
+    # Cold table and no book, so every move is a full search
+    ttt.transposition_table.clear()
+    before = ttt.nodes
+    action = ttt.search(board, -math.inf, math.inf)[1]
+    return action, ttt.nodes - before
+
+
+def bitboard_negamax(board):
+    before = bitboard.nodes
+    action = bitboard.minimax(board)
+    return action, bitboard.nodes - before
+
+
+def mnk_search(board):
+    searcher = mnk.Searcher(MNK_GAME, None)
+    action = searcher.best_move(board)
+    return action, searcher.nodes
+
+
+def monte_carlo(board):
+    action = MCTS_PLAYER.best_move(board)
+    return action, MCTS_PLAYER.iterations_run
+
+
+def random_player(rng):
+    def choose(board):
+        return rng.choice(sorted(ttt.actions(board))), 0
+    return choose
+
+
+# Engines by name; each returns (action, positions searched) for a board,
+# counting MCTS iterations as positions
+ENGINES = {
+    "plain": plain_minimax,
+    "minimax": shipped_minimax,
+    "alphabeta": alpha_beta,
+    "bitboard": bitboard_negamax,
+    "mnk": mnk_search,
+    "mcts": monte_carlo,
+}
+
+
+def engine(name, rng):
+    if name == "random":
+        return random_player(rng)
+    return ENGINES[name]
+
+
+def play_game(x, o, rows=None, game=0):
+    """
+    Plays one game between engines x and o, appending a row per move to
+    rows if given. Returns the winner, or None for a tie.
+    """
+    board = ttt.initial_state()
+    ply = 0
+    while not ttt.terminal(board):
+        name, choose = x if ttt.player(board) == ttt.X else o
+        start = time.perf_counter()
+        action, nodes = choose(board)
+        elapsed = time.perf_counter() - start
+        if rows is not None:
+            rows.append({"game": game, "ply": ply,
+                         "player": ttt.player(board), "engine": name,
+                         "move": f"{action[0]},{action[1]}",
+                         "seconds": elapsed, "nodes": nodes})
+        board = ttt.result(board, action)
+        ply += 1
+    return ttt.winner(board)
+
+
+def summarize(rows, outcomes):
+    """
+    Returns outcome counts and per-engine move statistics for the moves in
+    rows.
+    """
+    report = {"games": sum(outcomes.values()), "outcomes": outcomes,
+              "engines": {}}
+    by_engine = {}
+    for row in rows:
+        by_engine.setdefault(row["engine"], []).append(row)
+    for name, moves in by_engine.items():
+        seconds = sorted(row["seconds"] for row in moves)
+        nodes = [row["nodes"] for row in moves]
+        report["engines"][name] = {
+            "moves": len(moves),
+            "mean_ms": 1000 * sum(seconds) / len(seconds),
+            "p50_ms": 1000 * seconds[len(seconds) // 2],
+            "p99_ms": 1000 * seconds[min(len(seconds) - 1,
+                                         int(0.99 * len(seconds)))],
+            "max_ms": 1000 * seconds[-1],
+            "mean_nodes": sum(nodes) / len(nodes),
+            "total_nodes": sum(nodes),
+        }
+    return report
+
+
+def play(x_name, o_name, games, seed=0, rows=None):
+    """
+    Plays games between two engines by name. Returns a report dict.
+    """
+    rng = random.Random(seed)
+    rows = [] if rows is None else rows
+    start = len(rows)
+    # Game numbers carry on from earlier matches written to the same rows
+    first = rows[-1]["game"] + 1 if rows else 0
+    outcomes = {"X": 0, "O": 0, "tie": 0}
+    x = (x_name, engine(x_name, rng))
+    o = (o_name, engine(o_name, rng))
+    for game in range(first, first + games):
+        winner = play_game(x, o, rows, game)
+        outcomes["tie" if winner is None else winner] += 1
+    report = summarize(rows[start:], outcomes)
+    report["x"] = x_name
+    report["o"] = o_name
+    return report
+
+
+def compare(names, games, seed=0, rows=None):
+    """
+    Plays each engine against random as X, as O and against itself.
+    Returns a report per engine, with the games it lost.
+    """
+    reports = {}
+    for name in names:
+        as_x = play(name, "random", games, seed, rows)
+        as_o = play("random", name, games, seed, rows)
+        mirror = play(name, name, 1, seed, rows)
+        stats = {}
+        for report in (as_x, as_o, mirror):
+            for key, value in report["engines"][name].items():
+                stats.setdefault(key, []).append(value)
+        count = sum(stats["moves"])
+        reports[name] = {
+            "moves": count,
+            "mean_ms": sum(m * c for m, c in zip(stats["mean_ms"],
+                                                 stats["moves"])) / count,
+            "max_ms": max(stats["max_ms"]),
+            "mean_nodes": sum(stats["total_nodes"]) / count,
+            "losses": as_x["outcomes"]["O"] + as_o["outcomes"]["X"],
+            "self_play": max(mirror["outcomes"],
+                             key=mirror["outcomes"].get),
+        }
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tic Tac Toe self-play.")
+    parser.add_argument("command", choices=["play", "compare"])
+    choices = sorted(ENGINES) + ["random"]
+    parser.add_argument("--x", default="minimax", choices=choices)
+    parser.add_argument("--o", default="random", choices=choices)
+    parser.add_argument("--engines", default=",".join(ENGINES),
+                        help="comma separated engines to compare")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="write every move to this file")
+    parser.add_argument("--json", help="write the report to this file")
+    args = parser.parse_args()
+
+    rows = []
+    if args.command == "play":
+        report = play(args.x, args.o, args.games, args.seed, rows)
+    else:
+        names = args.engines.split(",")
+        for name in names:
+            if name not in ENGINES:
+                parser.error(f"unknown engine {name}")
+        report = compare(names, args.games, args.seed, rows)
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["game", "ply", "player",
+                                                   "engine", "move",
+                                                   "seconds", "nodes"])
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,59 @@ Tic Tac Toe Player
 """
 
 import math
+import os
+import struct
 
 X = "X"
 O = "O"
 EMPTY = None
 
+# Best utility a player can reach; finding it ends the search early
+WIN = 1
+
+# Order in which moves are searched: center, corners, then edges
+MOVE_ORDER = [(1, 1),
+              (0, 0), (0, 2), (2, 0), (2, 2),
+              (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Where each of the 8 rotations and reflections of the board sends cell
+# 3 * i + j, and the base 3 place value each cell takes in that frame
+SYMMETRIES = [
+    [3 * i + j for i in range(3) for j in range(3)],
+    [3 * j + (2 - i) for i in range(3) for j in range(3)],
+    [3 * (2 - i) + (2 - j) for i in range(3) for j in range(3)],
+    [3 * (2 - j) + i for i in range(3) for j in range(3)],
+    [3 * i + (2 - j) for i in range(3) for j in range(3)],
+    [3 * (2 - i) + j for i in range(3) for j in range(3)],
+    [3 * j + i for i in range(3) for j in range(3)],
+    [3 * (2 - j) + (2 - i) for i in range(3) for j in range(3)],
+]
+SYMMETRY_POWERS = [[3 ** cell for cell in symmetry] for symmetry in SYMMETRIES]
+CELL_CODES = {EMPTY: 0, X: 1, O: 2}
+
+# Kinds of value stored in the transposition table
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Maps canonical board keys to (value, bound, best action in canonical
+# frame); kept for the life of the process
+transposition_table = {}
+
+# Positions visited by search, for benchmarks; never reset
+nodes = 0
+
+# Solved positions written by book.py: a header, then one record per
+# canonical position of its key and a word holding the mask of optimal
+# cells (in the canonical frame) in bits 0-8 and value + 1 in bits 9-10
+BOOK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_MAGIC = b"TTTBOOK1"
+BOOK_RECORD = struct.Struct("<HH")
+
+# Maps canonical board keys to (value, optimal cell mask); None until the
+# book is first needed, and empty if there is no book
+book = None
+
 
 def initial_state():
     """
@@ -78,49 +126,149 @@ def utility(board):
     else:
         return 0
 
+def ordered_actions(board):
+    """
+    Returns the available actions in search order: center, corners, edges.
+    """
+    return [action for action in MOVE_ORDER
+            if board[action[0]][action[1]] == EMPTY]
+
+
 def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Uses alpha-beta pruning, trying the center, then corners, then edges,
+    and stops as soon as a move forcing a win is found. Results are kept in
+    the transposition table, so later calls in the same process reuse them.
+    Positions in the opening book are answered without searching.
+    """
     if terminal(board):
         return None
 
-    current_player = player(board)
+    key, symmetry = canonical(board)
+    entry = load_book().get(key)
+    if entry is not None:
+        moves = entry[1]
+        for action in ordered_actions(board):
+            if moves >> transform_cell(action, symmetry) & 1:
+                return action
+
+    return search(board, -math.inf, math.inf)[1]
+
+def max_value(board, alpha=-math.inf, beta=math.inf):
+    return search(board, alpha, beta)[0]
+
+def min_value(board, alpha=-math.inf, beta=math.inf):
+    return search(board, alpha, beta)[0]
 
-    if current_player == X:
-        # Maximize for X
-        best_value = -math.inf
-        best_move = None
-        for action in actions(board):
-            new_board = result(board, action)
-            value = min_value(new_board)
+def search(board, alpha, beta):
+    """
+    Returns (value, best action) for the player to move, X maximizing and
+    O minimizing. The value is exact if it lies strictly between alpha and
+    beta, and otherwise only a bound on the true value.
+    """
+    global nodes
+    nodes += 1
+    if terminal(board):
+        return utility(board), None
+
+    key, symmetry = canonical(board)
+    entry = transposition_table.get(key)
+    moves = ordered_actions(board)
+    if entry is not None:
+        value, bound, move = entry
+        move = untransform(move, symmetry)
+        if (bound == EXACT
+                or (bound == LOWER and value >= beta)
+                or (bound == UPPER and value <= alpha)):
+            return value, move
+        # Otherwise the stored move is still the best one to try first
+        moves.remove(move)
+        moves.insert(0, move)
+
+    original_alpha, original_beta = alpha, beta
+    maximizing = player(board) == X
+    goal = WIN if maximizing else -WIN
+    best_value = -math.inf if maximizing else math.inf
+    best_move = None
+    for action in moves:
+        value = search(result(board, action), alpha, beta)[0]
+        if maximizing:
             if value > best_value:
                 best_value = value
                 best_move = action
-        return best_move
-    else:
-        # Minimize for O
-        best_value = math.inf
-        best_move = None
-        for action in actions(board):
-            new_board = result(board, action)
-            value = max_value(new_board)
+            alpha = max(alpha, value)
+        else:
             if value < best_value:
                 best_value = value
                 best_move = action
-        return best_move
+            beta = min(beta, value)
+        if alpha >= beta or best_value == goal:
+            break
 
-def max_value(board):
-    if terminal(board):
-        return utility(board)
-    v = -math.inf
-    for action in actions(board):
-        new_board = result(board, action)
-        v = max(v, min_value(new_board))
-    return v
-
-def min_value(board):
-    if terminal(board):
-        return utility(board)
-    v = math.inf
-    for action in actions(board):
-        new_board = result(board, action)
-        v = min(v, max_value(new_board))
-    return v
+    if best_value <= original_alpha:
+        bound = UPPER
+    elif best_value >= original_beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    transposition_table[key] = (best_value, bound, transform(best_move, symmetry))
+    return best_value, best_move
+
+
+def canonical(board):
+    """
+    Returns (key, symmetry) where key encodes the board in base 3 under
+    whichever of the 8 rotations and reflections gives the smallest code,
+    and symmetry is the index of that transformation.
+    """
+    cells = [CELL_CODES[board[i][j]] for i in range(3) for j in range(3)]
+    best = None
+    for symmetry, powers in enumerate(SYMMETRY_POWERS):
+        code = sum(cell * power for cell, power in zip(cells, powers))
+        if best is None or code < best[0]:
+            best = (code, symmetry)
+    return best
+
+
+def transform(action, symmetry):
+    """
+    Maps an action on the board into the frame of its canonical key.
+    """
+    return divmod(transform_cell(action, symmetry), 3)
+
+
+def transform_cell(action, symmetry):
+    i, j = action
+    return SYMMETRIES[symmetry][3 * i + j]
+
+
+def untransform(action, symmetry):
+    """
+    Maps an action in the canonical frame back onto the board.
+    """
+    i, j = action
+    return divmod(SYMMETRIES[symmetry].index(3 * i + j), 3)
+
+
+def load_book(path=BOOK_PATH):
+    """
+    Returns the opening book, reading it on first use. A missing or
+    damaged book gives an empty one, so every position is searched.
+    """
+    global book
+    if book is None:
+        book = {}
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return book
+        if not data.startswith(BOOK_MAGIC):
+            return book
+        records = data[len(BOOK_MAGIC):]
+        usable = len(records) - len(records) % BOOK_RECORD.size
+        for key, packed in BOOK_RECORD.iter_unpack(records[:usable]):
+            book[key] = ((packed >> 9) - 1, packed & 0x1FF)
+    return book